@@ -2,14 +2,20 @@
 
 """Command line tool for working with JXON and some utilities for JXON CI."""
 
+import argparse
 import base64
+import collections
 import fractions
 import io
 import json
 import numbers
 import os
+import platform
+import random
 import sys
 import struct
+import time
+import tracemalloc
 
 import jxon
 
@@ -101,6 +107,17 @@ def dump_pretty(stream, f, indent=""):
             i = struct.unpack("<q", block)[0]
         return s, i
 
+    def readhex_bigint():
+        s = ""
+        words = b""
+        while True:
+            word = stream.read(8)
+            s = s + " " + word.hex()
+            words = words + word
+            if len(word) < 8 or word[7] < 0x80:
+                break
+        return s[1:], jxon.decode(b"\x8E" + words)
+
     def readhex_i(head):
         i = 0
         additional = ""
@@ -113,7 +130,7 @@ def dump_pretty(stream, f, indent=""):
         elif head & 0x0F == 13:
             additional, i = readhex(8)
         elif head & 0x0F == 14:
-            pass # TODO BigInt
+            additional, i = readhex_bigint()
         elif head & 0x0F == 15:
             i = -1
         else:
@@ -190,7 +207,9 @@ def dump_pretty(stream, f, indent=""):
         elif head == 0xF8:
             write_line(head, 'float64', additional_bytes=8)
         elif head == 0xF9:
-            write_line(head, 'BigFloat (not implemented yet)')
+            mantissa = readhex_bigint()[0]
+            exponent = readhex_bigint()[0]
+            write_line(head, 'BigFloat', additional=" " + mantissa + "  " + exponent)
         elif 0x80 <= head <= 0xBF:
             i = 0
             additional = ""
@@ -203,7 +222,7 @@ def dump_pretty(stream, f, indent=""):
             elif head & 0x0F == 13:
                 additional, i = readhex(8)
             elif head & 0x0F == 14:
-                pass # TODO BigInt
+                additional, i = readhex_bigint()
             elif head & 0x0F == 15:
                 i = -1
             else:
@@ -274,8 +293,10 @@ def example_f(name, f, meaning=None):
         meaning = str(f.numerator) + '/' + str(f.denominator)
     example(name, f, meaning=meaning)
 
-def example_movies():
-    """Generates movies dataset."""
+def generate_movies(count=1000):
+    """Returns list of randomly generated movies sorted by year, the same
+       for the same count.
+    """
 
     z = 20170705
     a = 742938285
@@ -324,7 +345,7 @@ def example_movies():
         return director
 
     movies = []
-    while len(movies) < 1000:
+    while len(movies) < count:
         genres = ['comedy']
         movies.append({'id': randomMovieId(),
                        'year': 1900 + rand() % 200,
@@ -333,7 +354,12 @@ def example_movies():
                        'genres': genres})
 
     movies.sort(key = lambda movie: movie['year'])
+    return movies
 
+def example_movies():
+    """Generates movies dataset."""
+
+    movies = generate_movies()
     example('movies', {"movies": movies},
             meaning='List of randomly generated movies')
     example('movies_compressed', {"movies": movies},
@@ -404,6 +430,217 @@ def generate_examples():
     readme.end()
 
 
+def dump_json_events(events, fp):
+    """Writes events of jxon.iterparse() to binary file fp as JSON,
+       top-level values on separate lines.
+    """
+
+    parts = []
+    stack = [] # True for open objects, False for open arrays
+    first = True # nothing is written to the current structure yet
+    for event, value, _ in events:
+        if event == 'table_put':
+            continue
+        if event == 'key':
+            parts.append(('' if first else ',') + json.dumps(value) + ':')
+            first = False
+            continue
+        if event == 'end':
+            parts.append('}' if stack.pop() else ']')
+        else:
+            if stack and not stack[-1] and not first:
+                parts.append(',')
+            if event == 'start_object' or event == 'start_array':
+                parts.append('{' if event == 'start_object' else '[')
+                stack.append(event == 'start_object')
+                first = True
+                continue
+            parts.append(json.dumps(value, cls=JSONExtendedEncoder))
+        first = False
+        if not stack:
+            parts.append('\n')
+        if len(parts) >= 4096:
+            fp.write(''.join(parts).encode('utf-8'))
+            parts.clear()
+    fp.write(''.join(parts).encode('utf-8'))
+
+
+def convert(args):
+    """Converts JSON to JXON or back, streaming tokens from one format to the
+       other without building values in memory.
+    """
+
+    parser = argparse.ArgumentParser(prog='jxon-cl.py convert', description=convert.__doc__)
+    parser.add_argument('--to', choices=['jxon', 'json'], required=True,
+                        help='format of the output, the input is in the other one')
+    parser.add_argument('--auto-keys', action='store_true',
+                        help='count keys in the first pass over the input and put '
+                             'the most frequent ones to the keys table')
+    parser.add_argument('--float-mode', choices=['shortest', 'f64', 'f32_lossy'],
+                        default='shortest', help='see jxon.encode()')
+    parser.add_argument('input', help='input file, - for stdin')
+    parser.add_argument('output', help='output file, - for stdout')
+    args = parser.parse_args(args)
+    if args.auto_keys and (args.to == 'json' or args.input == '-'):
+        parser.error('--auto-keys needs JSON input from a file')
+
+    source = sys.stdin.buffer if args.input == '-' else open(args.input, 'rb')
+    target = sys.stdout.buffer if args.output == '-' else open(args.output, 'wb')
+    with source, target:
+        if args.to == 'json':
+            dump_json_events(jxon.iterparse(source), target)
+            return
+        key_counts = None
+        if args.auto_keys:
+            # dump_events() puts the table before every top-level value
+            key_counts = collections.Counter()
+            values = depth = 0
+            for event, value, _ in jxon.iterparse_json(source):
+                if event == 'key':
+                    key_counts[value] += 1
+                elif event in ('start_object', 'start_array'):
+                    values += depth == 0
+                    depth += 1
+                elif event == 'end':
+                    depth -= 1
+                elif depth == 0:
+                    values += 1
+            key_counts = {key: count / values for key, count in key_counts.items()}
+            source.seek(0)
+        jxon.dump_events(jxon.iterparse_json(source), target,
+                         key_counts=key_counts, float_mode=args.float_mode)
+
+
+def generate_numeric(count):
+    """Returns list of records of numbers: integers, floats and arrays."""
+
+    rand = random.Random(count)
+    return [{'id': i,
+             'time': 1500000000 + i * 0.25,
+             'position': [rand.uniform(-180, 180), rand.uniform(-90, 90), rand.random()],
+             'speed': rand.gauss(0, 10),
+             'counters': [rand.randrange(1 << 16) for _ in range(8)]}
+            for i in range(count)]
+
+def generate_strings(count):
+    """Returns list of records of text fields of various lengths."""
+
+    rand = random.Random(count)
+    words = ['lorem', 'ipsum', 'dolor', 'sit', 'amet', 'привет', 'мир', '你好', 'JXON',
+             'consectetur', 'adipiscing', 'elit', 'sed', 'do', 'eiusmod', 'tempor']
+    return [{'id': f'{i:016x}',
+             'name': ' '.join(rand.choice(words) for _ in range(3)),
+             'text': ' '.join(rand.choice(words) for _ in range(rand.randrange(10, 60))),
+             'tags': [rand.choice(words) for _ in range(rand.randrange(5))]}
+            for i in range(count)]
+
+def generate_nested(count, depth=8):
+    """Returns list of records with objects and arrays nested depth times."""
+
+    rand = random.Random(count)
+    records = []
+    for i in range(count):
+        record = {'value': rand.randrange(1000), 'flag': rand.random() < 0.5}
+        for level in range(depth):
+            record = {'level': level, 'items': [record, None], 'meta': {'ok': True}}
+        record['id'] = i
+        records.append(record)
+    return records
+
+BENCH_SHAPES = {
+    'movies': generate_movies,
+    'numeric': generate_numeric,
+    'strings': generate_strings,
+    'nested': generate_nested,
+}
+
+def parse_count(text):
+    """Returns number of records written like 1000, 10k or 1M."""
+
+    multiplier = {'k': 1000, 'M': 1000000}.get(text[-1:], 1)
+    return int(text[:-1] if multiplier > 1 else text) * multiplier
+
+def bench_formats(shape, records):
+    """Returns dict of format -> (encode, decode) functions for the dataset."""
+
+    document = {'movies' if shape == 'movies' else 'records': records}
+    formats = {
+        'jxon': (lambda: jxon.encode(document), jxon.decode),
+        'jxon_auto_keys': (lambda: jxon.encode(document, auto_keys=True), jxon.decode),
+        'json': (lambda: json.dumps(document, separators=(',', ':')).encode('utf-8'),
+                 json.loads),
+    }
+    if shape == 'movies':
+        try:
+            import movies_pb2
+        except ImportError as exception: # protobuf package is not installed
+            print('protobuf is skipped:', exception, file=sys.stderr)
+            return formats
+        message = movies_pb2.MoviesDataset()
+        for movie in records:
+            message.movies.add(**movie)
+        formats['protobuf'] = (lambda: message.SerializeToString(deterministic=True),
+                               movies_pb2.MoviesDataset.FromString)
+    return formats
+
+def measure_call(function, repeat):
+    """Returns the least time of calling function repeat times, peak memory
+       allocated by it and its result.
+    """
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    del result
+    tracemalloc.start()
+    result = function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, result
+
+def bench(args):
+    """Measures encoding and decoding of generated datasets by JXON, JSON and
+       protobuf (movies only, if movies_pb2 can be imported): throughput,
+       encoded size and peak memory allocated by python.
+    """
+
+    parser = argparse.ArgumentParser(prog='jxon-cl.py bench', description=bench.__doc__)
+    parser.add_argument('--shapes', default=','.join(BENCH_SHAPES),
+                        help='comma separated datasets: ' + ', '.join(BENCH_SHAPES))
+    parser.add_argument('--records', default='1k,10k,100k',
+                        help='comma separated numbers of records, e.g. 1k,1M,10M')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of runs, the fastest one is reported')
+    parser.add_argument('--output', help='JSON file for the results')
+    args = parser.parse_args(args)
+
+    results = []
+    print(f"{'shape':8} {'records':>8} {'format':15} {'size':>11} "
+          f"{'enc MB/s':>9} {'dec MB/s':>9} {'enc peak':>9} {'dec peak':>9}")
+    for shape in args.shapes.split(','):
+        for count in map(parse_count, args.records.split(',')):
+            records = BENCH_SHAPES[shape](count)
+            for name, (encode, decode) in bench_formats(shape, records).items():
+                encode_time, encode_peak, data = measure_call(encode, args.repeat)
+                decode_time, decode_peak, _ = measure_call(lambda: decode(data), args.repeat) # pylint: disable=cell-var-from-loop
+                result = {'shape': shape, 'records': count, 'format': name, 'size': len(data),
+                          'encode_seconds': encode_time, 'decode_seconds': decode_time,
+                          'encode_peak_bytes': encode_peak, 'decode_peak_bytes': decode_peak}
+                results.append(result)
+                print(f"{shape:8} {count:8} {name:15} {len(data):11} "
+                      f"{len(data) / encode_time / 1e6:9.1f} {len(data) / decode_time / 1e6:9.1f} "
+                      f"{encode_peak / 1e6:7.1f}MB {decode_peak / 1e6:7.1f}MB")
+            del records
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'python': platform.python_version(),
+                       'machine': platform.machine(),
+                       'results': results}, f, indent=4)
+
 if __name__ == "__main__" :
     subprogram = sys.argv[1]
 
@@ -411,4 +648,12 @@ if __name__ == "__main__" :
         generate_examples()
         sys.exit()
 
+    if subprogram == "convert":
+        convert(sys.argv[2:])
+        sys.exit()
+
+    if subprogram == "bench":
+        bench(sys.argv[2:])
+        sys.exit()
+
     print("Unknown subprogram ", subprogram)
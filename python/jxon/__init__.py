@@ -0,0 +1,116 @@
+"""Module for encoding and decoding JXON values.
+
+   The implementation is split into private modules by topic, the public
+   API is imported from them here.
+"""
+
+#
+#   Originally published to https://github.com/visualdoj/jxon
+#
+#   Author:  Doj
+#   License: Public domain or MIT
+#
+
+from ._decoding import Record, StringCache
+from ._encoding import dump_events, Encoder
+from ._stats import Stats
+from ._streams import Parser, load, iterparse, iterparse_json
+from ._document import decode, Decoder, encode, dump
+from ._lazy import LazyObject, LazyArray, decode_lazy
+from ._columns import decode_columns
+from ._records import Index, build_index, iter_file, decode_file_parallel
+from ._session import Session, aiter_values, awrite
+
+
+#  ---------------------------------------------------------------------------
+#
+#                            .:~~. ..
+#                    .    ^JB#&&&BGBGP?^         .:.
+#                :?JPP5?75@@#BBB@B&#JP#B~:::!Y5BB#&BY5557^
+#               J&#BGB@@@@@@@G!!J?J#&@@@@&&&@@@&@&@@@@BPB#?
+#           :?5P@@B5B@@&&@@@&@B?!^Y@@&#@@@@@@@@BPJ#&B&@@&@@BGG5!:
+#          ~&@@@&@@@@@@#GYP@&#@@B#@@&##&@@&#@@@&GY#Y?#@#5&@@&5#&B!
+#        :G&@@@@@@&BG#@@&PYBJY&&#@@&&BPP@@&G#@@&G~^?5#B5PG&&5~JG&B5^
+#       ^G@@@&&BPB@B!7P@&B5#PPPB@&&##7!~#@@&BB&@B! :^7Y555#&G7!5#5GJ
+#       P@@@&#PP7JBG55JPJYJ77~.Y@@@#&5~.!&#B5B&P#B^^:.:^!G#&@@&&#@@7
+#       G@@@@@&&G!??^....^....:Y&@&&B&Y:^75PGBJ7##~:^ !?B@&#GBG#&@@&57~.
+#    :~J&@@@@&&&&##Y77:.^?:...:B#GP#BB! .^  !YPPPP.?7J#P&&#G!!P@@#@@@@@B?:
+#   !BB@@@&&&#&&&#&7 .^!!  .7!:J@&PB#Y~J5:.^7YB&?::Y!B&G5PY7~?&@#B@@&PB@@G^
+#  !#&Y?#@@@&#57PG5^:~ ^J   ^7?YPB#&@BP#P~!Y7YB5?^J. ~&#Y7:::P#PB##5?5P#@#GJ
+#  Y@B5P##&@@@###@?.?B5 ~7    .JJ .^?J5P?5G5JY~ .G:   !PPJ:^.!P5P&J:.JP#&&B5.
+#  ^&@@&BGYY#@@@@#??##B^:J7:..  5:     :^~. .   ?7     ~?JJ?5GP55!:~:JPGG&@G:
+# :P#@####7^^7?PBB##G!::::^~!!7!75             7?        :~!Y?^~^~:::~JG#BP##^
+# ^#G&@BPP:^^.  ^^^:           :^JJ           !J        .:^~7~^:JBPBG#BBB!!G#~
+#  !@@@BP?!J:.7J~                .G!         ~P7!!~~~~!7~^^..  ~#5?BB5P##BGPP:
+#  .P@@#GB&&5YY#P  :JY7:          :P!     .~Y?: ......:!7.    .?Y7.~7?5B&@#7^
+#    J&@@@@BB@@G?:.^!P#P           :B:  :7Y7:           ^7!.   77!:?GB&#@@G
+#     ^7P@&&@GJ~:!GG~J&B            ~5!?Y~.     ..!~:^.   ?!~^::7J5YGGGB#&@?
+#       :GBG@GGJJG#@GB#7             ~#!       ^77^^:~^  .?  .:..:^^!!~7PB@Y
+#        .?YP&@@&@&55J.              ~G        JJ~.::    :!   .!?YY::^JG##B~
+#            ^!!7~:                  ^B.      ~7Y~..::.:. .: ~!?~5BGJYG#@P7.
+#                                    :B.      ~5?!7^. ^. . ::??7JJJB#JJB#:
+#                                    ^B.       !5GYJ7:^!~!?7^^YP#&##BY5Y~
+#                                    !G         .?J57!7P57PP^!!7G@&7:^:
+#                                    75          .!JP5G#BPPY5G#BBP~
+#                                    ~P             :~~::!?JY?77^
+#                                     .                    .
+#
+#               __      ___                 _ _____        _
+#               \ \    / (_)               | |  __ \      (_)
+#                \ \  / / _ ___ _   _  __ _| | |  | | ___  _
+#                 \ \/ / | / __| | | |/ _` | | |  | |/ _ \| |
+#                  \  /  | \__ \ |_| | (_| | | |__| | (_) | |
+#                   \/   |_|___/\__,_|\__,_|_|_____/ \___/| |
+#                                                        _/ |
+#                                                       |__/
+#
+#  ---------------------------------------------------------------------------
+#  This software is available under 2 licenses -- choose whichever you prefer.
+#  ---------------------------------------------------------------------------
+#  ALTERNATIVE A - MIT License
+#
+#  Copyright (c) 2022 Viktor Matuzenko aka Doj
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#  DEALINGS IN THE SOFTWARE.
+#
+#  ---------------------------------------------------------------------------
+#  ALTERNATIVE B - Public Domain (www.unlicense.org)
+#
+#  This is free and unencumbered software released into the public domain.
+#
+#  Anyone is free to copy, modify, publish, use, compile, sell, or distribute
+#  this software, either in source code form or as a compiled binary, for any
+#  purpose, commercial or non-commercial, and by any means.
+#
+#  In jurisdictions that recognize copyright laws, the author or authors of
+#  this software dedicate any and all copyright interest in the software to
+#  the public domain. We make this dedication for the benefit of the public at
+#  large and to the detriment of our heirs and successors. We intend this
+#  dedication to be an overt act of relinquishment in perpetuity of all
+#  present and future rights to this software under copyright law.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+#  ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+#  For more information, please refer to <http://unlicense.org/>
+#  ---------------------------------------------------------------------------
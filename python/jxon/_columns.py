@@ -0,0 +1,203 @@
+"""Decoding of arrays of objects by columns, see decode_columns().
+"""
+
+#
+#   Originally published to https://github.com/visualdoj/jxon
+#
+#   Author:  Doj
+#   License: Public domain or MIT
+#
+
+# pylint: disable=duplicate-code # loops over keys are inlined for speed like in _decoding
+
+import array
+import struct
+import sys
+
+from ._decoding import (
+    _COLUMNS_KEY, _decode_object, _decode_put, _decode_size, _decode_string, _Decoder,
+    _make_decoders,
+)
+from ._fields import _skip_value
+
+
+def _find_value(decoder, path):
+    """Returns offset of the value found by path, skipping other values."""
+
+    buf = decoder.buf
+    pos = 0
+    for step in path:
+        head = buf[pos]
+        while head & 0xF0 == 0xB0:
+            pos = _decode_put(decoder, head, pos + 1)
+            head = buf[pos]
+        pos += 1
+        if head == 0xF3:
+            while True:
+                head = buf[pos]
+                pos += 1
+                if head < 0x80:
+                    key = decoder.table[head]
+                elif head == 0xF5:
+                    raise KeyError(step)
+                elif head & 0xF0 == 0xA0:
+                    key, pos = _decode_string(decoder, head, pos)
+                elif head & 0xF0 == 0xB0:
+                    pos = _decode_put(decoder, head, pos)
+                    continue
+                else:
+                    raise ValueError('key must be string')
+                if key == step:
+                    break
+                pos = _skip_value(decoder, buf[pos], pos + 1)
+        elif head == 0xF4:
+            if not isinstance(step, int) or step < 0:
+                raise TypeError('arrays are indexed by non-negative integers')
+            for _ in range(step):
+                if buf[pos] == 0xF5:
+                    raise IndexError(step)
+                pos = _skip_value(decoder, buf[pos], pos + 1)
+            if buf[pos] == 0xF5:
+                raise IndexError(step)
+        else:
+            raise TypeError('path goes through a scalar')
+    return pos
+
+
+def _typed_column(column, typed_arrays):
+    """Returns column as typed array if it contains only numbers."""
+
+    if not isinstance(column, list): # decoded as typed array already
+        return column
+    types = set(map(type, column))
+    if types == {int}:
+        if not all(-0x8000000000000000 <= i <= 0x7FFFFFFFFFFFFFFF for i in column):
+            return column
+        typecode = 'q'
+    elif types == {float}:
+        typecode = 'd'
+    elif types == {int, float}:
+        # ints of more than 53 bits would be rounded
+        if not all(-0x20000000000000 <= i <= 0x20000000000000 for i in column
+                   if isinstance(i, int)):
+            return column
+        typecode = 'd'
+    else:
+        return column
+    if typed_arrays == 'numpy':
+        import numpy # pylint: disable=import-outside-toplevel
+        return numpy.array(column, dtype=typecode)
+    return array.array(typecode, column)
+
+
+def _decode_records(decoder, pos):
+    """Decodes array of objects at pos into dict of columns of values.
+
+       Records missing a key have None in its column.
+    """
+
+    buf = decoder.buf
+    table = decoder.table
+    decoders = decoder.decoders
+    utf8_decode = decoder.utf8_decode
+    intern = sys.intern
+    columns = {}
+    count = 0
+    head = buf[pos]
+    while head != 0xF5:
+        while head & 0xF0 == 0xB0:
+            pos = _decode_put(decoder, head, pos + 1)
+            head = buf[pos]
+        if head != 0xF3:
+            raise ValueError('elements of the array must be objects')
+        pos += 1
+        filled = 0
+        while True:
+            head = buf[pos]
+            pos += 1
+            if head < 0x80:
+                key = table[head]
+            elif head == 0xF5:
+                break
+            elif head & 0xF0 == 0xA0:
+                size = head & 0x0F
+                if size > 9:
+                    size, pos = _decode_size(decoder, head, pos)
+                end = pos + size
+                key = intern(utf8_decode(buf[pos:end], None, True)[0])
+                pos = end + 1 # skip null character
+            elif head & 0xF0 == 0xB0:
+                pos = _decode_put(decoder, head, pos)
+                continue
+            else:
+                raise ValueError('key must be string')
+            column = columns.get(key)
+            if column is None:
+                column = columns[key] = [None] * count
+            elif len(column) > count: # duplicate key, the last value is kept
+                column.pop()
+                filled -= 1
+            head = buf[pos]
+            if 0xA0 <= head <= 0xA9:
+                end = pos + head - 0x9F
+                column.append(utf8_decode(buf[pos + 1:end], None, True)[0])
+                pos = end + 1
+            elif head == 0xAA and buf[pos + 1] < 0x80:
+                end = pos + 2 + buf[pos + 1]
+                column.append(utf8_decode(buf[pos + 2:end], None, True)[0])
+                pos = end + 1
+            else:
+                value, pos = decoders[head](decoder, head, pos + 1)
+                column.append(value)
+            filled += 1
+        count += 1
+        if filled != len(columns):
+            for column in columns.values():
+                if len(column) < count:
+                    column.append(None)
+        head = buf[pos]
+    return columns, pos + 1
+
+
+def decode_columns(data, path=(), typed_arrays=None):
+    """Decodes array of objects into dict of columns: lists of values of
+       every key of the objects, in order of the objects.
+
+       No dict is created per object. path is a key or a sequence of keys
+       and indexes of the array in the data, e.g. "movies". Objects missing
+       a key have None in its column. typed_arrays is "array" or "numpy" to
+       return columns of integers and floats as array.array or numpy.ndarray,
+       columns mixing floats and integers that are not exact as floats stay
+       lists.
+       Arrays stored by columns, see encode(columns=True), are supported too.
+    """
+
+    if isinstance(path, str):
+        path = (path,)
+    if typed_arrays not in (None, 'array', 'numpy'):
+        raise ValueError('typed_arrays must be "array" or "numpy"')
+    decoder = _Decoder(data, decoders=_make_decoders(typed_arrays, False))
+    buf = decoder.buf
+    try:
+        pos = _find_value(decoder, path)
+        head = buf[pos]
+        while head & 0xF0 == 0xB0:
+            pos = _decode_put(decoder, head, pos + 1)
+            head = buf[pos]
+        if head == 0xF3:
+            columns, pos = _decode_object(decoder, head, pos + 1)
+            if list(columns) != [_COLUMNS_KEY]:
+                raise TypeError('path must lead to an array')
+            columns = columns[_COLUMNS_KEY]
+        elif head == 0xF4:
+            columns, pos = _decode_records(decoder, pos + 1)
+        else:
+            raise TypeError('path must lead to an array')
+    except (IndexError, struct.error) as exception:
+        raise ValueError('Unexpected end of stream') from exception
+    if pos > len(buf):
+        raise ValueError('Unexpected end of stream')
+    if typed_arrays is not None:
+        for key, column in columns.items():
+            columns[key] = _typed_column(column, typed_arrays)
+    return columns
@@ -0,0 +1,597 @@
+"""Decoding of JXON values: the state of decoding, functions decoding every
+   head and the options of decode() choosing them.
+"""
+
+#
+#   Originally published to https://github.com/visualdoj/jxon
+#
+#   Author:  Doj
+#   License: Public domain or MIT
+#
+
+import array
+import codecs
+import collections
+import keyword
+import struct
+import sys
+import fractions
+import functools
+
+
+_INT8 = struct.Struct('<b')
+_INT16 = struct.Struct('<h')
+_INT32 = struct.Struct('<i')
+_INT64 = struct.Struct('<q')
+_FLOAT32 = struct.Struct('<f')
+_FLOAT64 = struct.Struct('<d')
+_UINT64 = struct.Struct('<Q')
+
+# integers and sizes in forms 0x?A, 0x?B, 0x?C and 0x?D
+_INT_STRUCTS = (_INT8, _INT16, _INT32, _INT64)
+
+# head byte followed by its argument
+_HEAD_INT8 = struct.Struct('<Bb')
+_HEAD_INT16 = struct.Struct('<Bh')
+_HEAD_INT32 = struct.Struct('<Bi')
+_HEAD_INT64 = struct.Struct('<Bq')
+_HEAD_FLOAT32 = struct.Struct('<Bf')
+_HEAD_FLOAT64 = struct.Struct('<Bd')
+
+_utf8_decode = codecs.utf_8_decode
+
+_MISSING = object()
+
+
+def _guess_jxon(data):
+    first = data[0]
+    return (0x80 <= first < 0xFE) and (first != 0xEF)
+
+
+def _as_buffer(data):
+    """Returns object for reading data by offsets without copying it."""
+
+    return data if isinstance(data, bytes) else memoryview(data)
+
+
+class _Decoder: # pylint: disable=too-few-public-methods # holds state only
+    """State of decoding: the buffer being decoded and the keys table.
+
+       Decoding functions below take the decoder, the head byte and the
+       offset right after the head. They return decoded value and the offset
+       right after the value.
+    """
+
+    __slots__ = ('buf', 'table', 'decoders', 'utf8_decode')
+
+    def __init__(self, data, table=None, decoders=None):
+        self.buf = _as_buffer(data)
+        self.table = [''] * 128 if table is None else table
+        self.decoders = _VALUE_DECODERS if decoders is None else decoders
+        self.utf8_decode = _utf8_decode # codecs.utf_8_decode or StringCache
+
+
+# BigInt is a sequence of 64-bit little-endian words, each holds 63 bits of
+# two's complement value starting from the least significant ones, the
+# highest bit is set in all words except the last one
+_BIGINT_MASK = (1 << 63) - 1
+_BIGINT_MORE = 1 << 63
+_BIGINT_SIGN = 1 << 62
+
+# 8 chunks of 63 bits take exactly 63 bytes
+_BIGINT_GROUP = struct.Struct('<8Q')
+
+# bytes with the highest bit set
+_HIGH_BYTES = bytes(range(0x80, 0x100))
+
+# number of words checked at once while looking for the end of a BigInt
+_BIGINT_BLOCK = 64
+
+
+def _bigint_end(buf, pos, end):
+    """Returns offset right after BigInt at pos, None if it does not end
+       before end.
+    """
+
+    while True:
+        limit = min(end, pos + 8 * _BIGINT_BLOCK)
+        tops = bytes(buf[pos + 7:limit:8])
+        more = len(tops) - len(tops.lstrip(_HIGH_BYTES))
+        if more < len(tops):
+            return pos + 8 * more + 8
+        if limit == end:
+            return None
+        pos = limit
+
+
+def _decode_bigint(decoder, pos):
+    buf = decoder.buf
+    end = _bigint_end(buf, pos, len(buf))
+    if end is None:
+        raise ValueError('Unexpected end of stream')
+    count = (end - pos) // 8
+    if count == 1:
+        value = _UINT64.unpack_from(buf, pos)[0]
+    else:
+        # chunks are joined by groups of 8 into bytes and converted at once
+        words = struct.unpack_from(f'<{count}Q', buf, pos)
+        mask = _BIGINT_MASK
+        data = bytearray()
+        for start in range(0, count, 8):
+            group = 0
+            for shift, word in zip(range(0, 504, 63), words[start:start + 8]):
+                group |= (word & mask) << shift
+            data += group.to_bytes(63, 'little')
+        value = int.from_bytes(data, 'little')
+    if (value >> (63 * count - 1)) & 1: # sign bit of the last chunk
+        value -= 1 << (63 * count)
+    return value, end
+
+
+def _decode_int(decoder, head, pos):
+    low = head & 0x0F
+    if low < 10:
+        return low, pos
+    if low == 15:
+        return -1, pos
+    if low == 14:
+        return _decode_bigint(decoder, pos)
+    int_struct = _INT_STRUCTS[low - 10]
+    return int_struct.unpack_from(decoder.buf, pos)[0], pos + int_struct.size
+
+
+def _decode_size(decoder, head, pos):
+    size = head & 0x0F
+    if 10 <= size <= 13:
+        int_struct = _INT_STRUCTS[size - 10]
+        size = int_struct.unpack_from(decoder.buf, pos)[0]
+        pos += int_struct.size
+    elif size == 14:
+        size, pos = _decode_bigint(decoder, pos)
+    elif size == 15:
+        size = -1
+    if size < 0:
+        raise ValueError('size must not be negative')
+    return size, pos
+
+
+def _decode_blob(decoder, head, pos):
+    size = head & 0x0F
+    if size > 9:
+        size, pos = _decode_size(decoder, head, pos)
+    end = pos + size
+    return bytes(decoder.buf[pos:end]), end
+
+
+def _decode_string(decoder, head, pos):
+    size = head & 0x0F
+    if size > 9:
+        size, pos = _decode_size(decoder, head, pos)
+    end = pos + size
+    # skip null character
+    return decoder.utf8_decode(decoder.buf[pos:end], None, True)[0], end + 1
+
+
+def _decode_put(decoder, head, pos):
+    """Decodes 0xB? command, returns offset of the next command."""
+
+    s, pos = _decode_string(decoder, head, pos)
+    index = decoder.buf[pos]
+    if index > 127:
+        raise ValueError('table index must be less than 128')
+    decoder.table[index] = sys.intern(s)
+    return pos + 1
+
+
+def _decode_put_and_value(decoder, head, pos):
+    buf = decoder.buf
+    while head & 0xF0 == 0xB0:
+        pos = _decode_put(decoder, head, pos)
+        head = buf[pos]
+        pos += 1
+    return decoder.decoders[head](decoder, head, pos)
+
+
+def _decode_object(decoder, head, pos):
+    buf = decoder.buf
+    table = decoder.table
+    decoders = decoder.decoders
+    utf8_decode = decoder.utf8_decode
+    intern = sys.intern
+    obj = {}
+    while True:
+        head = buf[pos]
+        pos += 1
+        if head < 0x80:
+            key = table[head]
+        elif head == 0xF5:
+            return obj, pos
+        elif head & 0xF0 == 0xA0:
+            size = head & 0x0F
+            if size > 9:
+                size, pos = _decode_size(decoder, head, pos)
+            end = pos + size
+            key = intern(utf8_decode(buf[pos:end], None, True)[0])
+            pos = end + 1 # skip null character
+        elif head & 0xF0 == 0xB0:
+            pos = _decode_put(decoder, head, pos)
+            continue
+        else:
+            raise ValueError('key must be string')
+        head = buf[pos]
+        if 0xA0 <= head <= 0xA9:
+            end = pos + head - 0x9F
+            obj[key] = utf8_decode(buf[pos + 1:end], None, True)[0]
+            pos = end + 1
+        elif head == 0xAA and buf[pos + 1] < 0x80:
+            end = pos + 2 + buf[pos + 1]
+            obj[key] = utf8_decode(buf[pos + 2:end], None, True)[0]
+            pos = end + 1
+        else:
+            obj[key], pos = decoders[head](decoder, head, pos + 1)
+
+
+def _decode_array(decoder, head, pos):
+    buf = decoder.buf
+    decoders = decoder.decoders
+    utf8_decode = decoder.utf8_decode
+    values = []
+    append = values.append
+    head = buf[pos]
+    while head != 0xF5:
+        if 0xA0 <= head <= 0xA9:
+            end = pos + head - 0x9F
+            append(utf8_decode(buf[pos + 1:end], None, True)[0])
+            pos = end + 1
+        else:
+            value, pos = decoders[head](decoder, head, pos + 1)
+            append(value)
+        head = buf[pos]
+    return values, pos + 1
+
+
+def _decode_float32(decoder, _head, pos):
+    return _FLOAT32.unpack_from(decoder.buf, pos)[0], pos + 4
+
+
+def _decode_float64(decoder, _head, pos):
+    return _FLOAT64.unpack_from(decoder.buf, pos)[0], pos + 8
+
+
+# binary exponents of large floats are limited, so a few bytes of input can
+# not expand to an arbitrarily large number
+_BIGFLOAT_EXPONENT_LIMIT = 1 << 20
+
+
+def _decode_bigfloat(decoder, _head, pos):
+    mantissa, pos = _decode_bigint(decoder, pos)
+    exponent, pos = _decode_bigint(decoder, pos)
+    if abs(exponent) > _BIGFLOAT_EXPONENT_LIMIT:
+        raise ValueError('exponent of large float is out of range')
+    if exponent >= 0:
+        return fractions.Fraction(mantissa << exponent), pos
+    return fractions.Fraction(mantissa, 1 << -exponent), pos
+
+
+def _decode_constant(value):
+    def decode_constant(_decoder, _head, pos):
+        return value, pos
+    return decode_constant
+
+
+def _decode_end(decoder, head, pos):
+    raise ValueError('unexpected end of a structure')
+
+
+def _decode_invalid(decoder, head, pos):
+    raise ValueError('Unknown head in JXON ' + hex(head))
+
+
+def _make_value_decoders():
+    """Returns list of decoding functions indexed by head byte."""
+
+    decoders = [_decode_invalid] * 256
+    decoders[0x80:0x90] = [_decode_int] * 16
+    decoders[0x90:0xA0] = [_decode_blob] * 16
+    decoders[0xA0:0xB0] = [_decode_string] * 16
+    decoders[0xB0:0xC0] = [_decode_put_and_value] * 16
+    decoders[0xF0] = _decode_constant(None)
+    decoders[0xF1] = _decode_constant(False)
+    decoders[0xF2] = _decode_constant(True)
+    decoders[0xF3] = _decode_object
+    decoders[0xF4] = _decode_array
+    decoders[0xF5] = _decode_end
+    decoders[0xF6] = _decode_constant(0.0)
+    decoders[0xF7] = _decode_float32
+    decoders[0xF8] = _decode_float64
+    decoders[0xF9] = _decode_bigfloat
+    return decoders
+
+_VALUE_DECODERS = _make_value_decoders()
+
+
+# head of elements of typed arrays -> (size of element, array.array typecode,
+# numpy dtype of element)
+_TYPED_ELEMENTS = {
+    0x8A: (1, 'b', '<i1'),
+    0x8B: (2, 'h', '<i2'),
+    0x8C: (4, 'i', '<i4'),
+    0x8D: (8, 'q', '<i8'),
+    0xF7: (4, 'f', '<f4'),
+    0xF8: (8, 'd', '<f8'),
+}
+
+# number of heads checked at once while looking for the end of a typed array
+_TYPED_BLOCK = 4096
+
+
+def _typed_array_size(buf, head, pos, stride):
+    """Returns number of elements of the array at pos if all of them start
+       with head and have the same size, None otherwise.
+    """
+
+    count = 0
+    heads = bytes((head,))
+    while True:
+        block = bytes(buf[pos:pos + stride * _TYPED_BLOCK:stride])
+        rest = block.lstrip(heads)
+        count += len(block) - len(rest)
+        if rest:
+            return count if rest[0] == 0xF5 else None
+        if len(block) < _TYPED_BLOCK:
+            raise ValueError('Unexpected end of stream')
+        pos += stride * _TYPED_BLOCK
+
+
+def _array_array(buf, pos, count, element):
+    size, typecode, _ = element
+    stride = size + 1
+    end = pos + count * stride
+    data = bytearray(count * size)
+    for i in range(size):
+        data[i::size] = buf[pos + 1 + i:end:stride]
+    array_ = array.array(typecode, data)
+    if sys.byteorder != 'little':
+        array_.byteswap()
+    return array_
+
+
+def _numpy_array(buf, pos, count, element):
+    import numpy # pylint: disable=import-outside-toplevel
+    dtype = element[2]
+    elements = numpy.frombuffer(buf, numpy.dtype([('head', 'u1'), ('value', dtype)]),
+                                count, pos)
+    return elements['value'].astype(dtype[1:])
+
+
+_TYPED_ARRAYS = {
+    'array': _array_array,
+    'numpy': _numpy_array,
+}
+
+
+def _make_typed_array_decoder(make_array):
+    """Returns function decoding arrays of elements of the same type and
+       size with make_array.
+
+       make_array takes the buffer, offset and number of the elements, and
+       their entry of _TYPED_ELEMENTS.
+    """
+
+    def decode_array(decoder, head, pos):
+        buf = decoder.buf
+        element = _TYPED_ELEMENTS.get(buf[pos])
+        if element is not None:
+            count = _typed_array_size(buf, buf[pos], pos, element[0] + 1)
+            if count is not None:
+                return (make_array(buf, pos, count, element),
+                        pos + count * (element[0] + 1) + 1)
+        return _decode_array(decoder, head, pos)
+
+    return decode_array
+
+
+# the only key of objects storing arrays of objects by columns
+_COLUMNS_KEY = '@columns'
+
+
+def _decode_columnar_object(decoder, head, pos):
+    """Decodes object, converting array of objects stored by columns, see
+       encode(columns=True), back to the array.
+    """
+
+    obj, pos = _decode_object(decoder, head, pos)
+    columns = obj.get(_COLUMNS_KEY) if len(obj) == 1 else None
+    if not isinstance(columns, dict):
+        return obj, pos
+    keys = list(columns)
+    if len(set(map(len, columns.values()))) > 1:
+        raise ValueError('columns must be of the same length')
+    return [dict(zip(keys, row)) for row in zip(*columns.values())], pos
+
+
+def _is_field_name(key):
+    return key.isidentifier() and not keyword.iskeyword(key) and key[0] != '_'
+
+
+# classes are shared between calls of decode()
+@functools.lru_cache(maxsize=1024)
+def _namedtuple_factory(keys):
+    if len(set(keys)) != len(keys) or not all(map(_is_field_name, keys)):
+        return None
+    return collections.namedtuple('Record', keys)._make
+
+
+class Record:
+    """Base of classes with __slots__ built by decode(object_factory="slots").
+
+       Fields are the keys of the decoded object, in the same order.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def __eq__(self, other):
+        if type(other) is not type(self): # pylint: disable=unidiomatic-typecheck
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name)
+                   for name in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'Record({fields})'
+
+    def _asdict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+@functools.lru_cache(maxsize=1024)
+def _slots_factory(keys):
+    if len(set(keys)) != len(keys) or not all(map(_is_field_name, keys)):
+        return None
+    return type('Record', (Record,), {'__slots__': keys})
+
+
+def _tuple_factory(_keys):
+    return tuple
+
+
+_OBJECT_FACTORIES = {
+    'namedtuple': _namedtuple_factory,
+    'slots': _slots_factory,
+    'tuple': _tuple_factory,
+}
+
+
+def _make_object_decoder(factory):
+    """Returns function decoding objects with constructors returned by
+       factory for tuples of their keys.
+    """
+
+    constructors = {} # tuple of keys -> constructor or None
+
+    def decode_object(decoder, head, pos):
+        buf = decoder.buf
+        table = decoder.table
+        decoders = decoder.decoders
+        utf8_decode = decoder.utf8_decode
+        keys = []
+        values = []
+        while True:
+            head = buf[pos]
+            pos += 1
+            if head < 0x80:
+                keys.append(table[head])
+            elif head == 0xF5:
+                break
+            elif head & 0xF0 == 0xA0:
+                key, pos = _decode_string(decoder, head, pos)
+                keys.append(sys.intern(key))
+            elif head & 0xF0 == 0xB0:
+                pos = _decode_put(decoder, head, pos)
+                continue
+            else:
+                raise ValueError('key must be string')
+            head = buf[pos]
+            if 0xA0 <= head <= 0xA9:
+                end = pos + head - 0x9F
+                values.append(utf8_decode(buf[pos + 1:end], None, True)[0])
+                pos = end + 1
+            elif head == 0xAA and buf[pos + 1] < 0x80:
+                end = pos + 2 + buf[pos + 1]
+                values.append(utf8_decode(buf[pos + 2:end], None, True)[0])
+                pos = end + 1
+            else:
+                value, pos = decoders[head](decoder, head, pos + 1)
+                values.append(value)
+        keys = tuple(keys)
+        constructor = constructors.get(keys, _MISSING)
+        if constructor is _MISSING:
+            constructor = constructors[keys] = factory(keys)
+        if constructor is None:
+            return dict(zip(keys, values)), pos
+        return constructor(values), pos
+
+    return decode_object
+
+
+def _make_decoders(typed_arrays, columns, object_factory=None):
+    """Returns list of decoding functions for the options of decode()."""
+
+    if typed_arrays is None and not columns and object_factory is None:
+        return None
+    decoders = list(_VALUE_DECODERS)
+    if typed_arrays is not None:
+        if typed_arrays not in _TYPED_ARRAYS:
+            raise ValueError('typed_arrays must be "array" or "numpy"')
+        decoders[0xF4] = _make_typed_array_decoder(_TYPED_ARRAYS[typed_arrays])
+    if columns:
+        if object_factory is not None:
+            raise ValueError('columns and object_factory can not be used together')
+        decoders[0xF3] = _decode_columnar_object
+    if object_factory is not None:
+        if isinstance(object_factory, str):
+            object_factory = _OBJECT_FACTORIES.get(object_factory, object_factory)
+        if not callable(object_factory):
+            raise ValueError('object_factory must be "namedtuple", "slots", '
+                             '"tuple" or callable')
+        decoders[0xF3] = _make_object_decoder(object_factory)
+    return decoders
+
+
+class StringCache:
+    """Bounded LRU cache of decoded strings keyed by their UTF-8 bytes, see
+       decode(string_cache=...).
+
+       Repeated strings are decoded once and shared by all values they
+       occur in. Only strings of at most max_length bytes are cached, longer
+       ones are rarely repeated and would evict the useful entries. The
+       cache may be reused between calls of decode(), hits and misses are
+       counted.
+    """
+
+    def __init__(self, maxsize=4096, max_length=64):
+        self._decode = functools.lru_cache(maxsize)(_utf8_decode)
+        self._max_length = max_length
+
+    def _decoder(self, buf):
+        """Returns function for _Decoder.utf8_decode decoding slices of buf."""
+
+        cached = self._decode
+        max_length = self._max_length
+        if isinstance(buf, bytes):
+            def decode_string(data, errors, final):
+                if len(data) > max_length:
+                    return _utf8_decode(data, errors, final)
+                return cached(data, errors, final)
+        else:
+            def decode_string(data, errors, final):
+                if len(data) > max_length:
+                    return _utf8_decode(data, errors, final)
+                # slices of writable buffers are not hashable, and slices of
+                # any buffer in the cache would keep it exported, e.g. an mmap
+                # could not be closed
+                return cached(bytes(data), errors, final)
+        return decode_string
+
+    @property
+    def hits(self):
+        """Number of strings found in the cache."""
+
+        return self._decode.cache_info().hits
+
+    @property
+    def misses(self):
+        """Number of strings decoded and put to the cache."""
+
+        return self._decode.cache_info().misses
+
+    def clear(self):
+        """Empties the cache and resets the counters."""
+
+        self._decode.cache_clear()
@@ -0,0 +1,205 @@
+"""decode() and encode() of whole documents with their options.
+"""
+
+#
+#   Originally published to https://github.com/visualdoj/jxon
+#
+#   Author:  Doj
+#   License: Public domain or MIT
+#
+
+import json
+import struct
+
+from ._decoding import _Decoder, _guess_jxon, _make_decoders, _MISSING
+from ._encoding import (
+    _count_keys, _encode_auto_keys, _encode_dict_with_columns, _encode_keys_table, _encode_value,
+    _Encoder, _float_mode_encoders, _WRITE_SIZE,
+)
+from ._fields import _compile_fields, _decode_selected, _select_python_value
+
+
+def decode(data, allow_JSON=True, fields=None, typed_arrays=None, columns=False, # pylint: disable=too-many-arguments,too-many-positional-arguments # public options
+           object_factory=None, string_cache=None, stats=None):
+    """Decodes JXON and returns it as a python value.
+
+       data may be bytes, bytearray, memoryview or any other object supporting
+       buffer protocol, it is decoded in place without copying.
+
+       fields is a list of paths to decode, e.g.
+       [["movies", "*", "year"], ["movies", "*", "title"]], or a single path.
+       A path is a list of keys of objects and indexes of arrays, "*" matches
+       any key or index. Objects and arrays keep only the selected keys and
+       elements, values outside of the paths are skipped by their sizes
+       without decoding.
+
+       typed_arrays is "array" or "numpy" to decode arrays of integers or
+       floats encoded with the same size, e.g. all as 0xF8, as array.array or
+       numpy.ndarray respectively, in bulk instead of element by element.
+
+       columns=True converts arrays of objects stored by columns, see
+       encode(columns=True), back to arrays of objects.
+
+       object_factory decodes objects to something lighter than dicts. It is
+       called once for every tuple of keys met and returns constructor, that
+       is called with list of values of every object with these keys, or
+       None for dicts.
+       Predefined factories are "namedtuple" and "slots" (subclass of
+       jxon.Record) for objects with keys that are valid field names, and
+       "tuple" for plain tuples of values.
+
+       string_cache is a StringCache for strings repeated in data, e.g.
+       names of genres. Keys of objects are always interned.
+
+       stats is a Stats accumulating numbers, bytes and time of decoded
+       values by heads, see Stats.
+    """
+
+    if not columns and fields is typed_arrays is object_factory is string_cache is stats is None:
+        # decoders without options are shared, tiny messages are common
+        return (_JSON_DECODER if allow_JSON else _JXON_DECODER).decode(data)
+    return Decoder(allow_JSON, fields, typed_arrays, columns, object_factory,
+                   string_cache, stats).decode(data)
+
+
+class Decoder: # pylint: disable=too-few-public-methods # decode() is all it does
+    """Reusable decoder, see decode() for the options.
+
+       Options are prepared once: paths of fields are compiled and decoding
+       functions are chosen at construction, classes created by
+       object_factory are kept between calls. Convenient for decoding many
+       small messages.
+    """
+
+    __slots__ = ('_allow_json', '_tree', '_decoders', '_string_cache', '_stats')
+
+    def __init__(self, allow_JSON=True, fields=None, typed_arrays=None, # pylint: disable=too-many-arguments,too-many-positional-arguments # options of decode()
+                 columns=False, object_factory=None, string_cache=None,
+                 stats=None):
+        self._allow_json = allow_JSON
+        self._tree = None if fields is None else _compile_fields(fields)
+        self._decoders = _make_decoders(typed_arrays, columns, object_factory)
+        if stats is not None:
+            self._decoders = stats._decoders(self._decoders) # pylint: disable=protected-access
+        self._string_cache = string_cache
+        self._stats = stats
+
+    def decode(self, data):
+        """Decodes JXON and returns it as a python value."""
+
+        tree = self._tree
+        if self._allow_json and not _guess_jxon(data):
+            try:
+                value = json.loads(data)
+            except Exception as exception:
+                raise ValueError('data must be in JXON or JSON format') from exception
+            if tree is not None:
+                selected = _select_python_value(value, tree)
+                value = value if selected is _MISSING else selected
+            return value
+
+        decoder = _Decoder(data, decoders=self._decoders)
+        buf = decoder.buf
+        if self._stats is not None:
+            self._stats._start() # pylint: disable=protected-access
+        if self._string_cache is not None:
+            decoder.utf8_decode = self._string_cache._decoder(buf) # pylint: disable=protected-access
+        try:
+            head = buf[0]
+            value, pos = _MISSING, 1
+            if tree is not None:
+                value, pos = _decode_selected(decoder, head, 1, tree)
+                decoder.table = [''] * 128
+            if value is _MISSING:
+                value, pos = decoder.decoders[head](decoder, head, 1)
+        except (IndexError, struct.error) as exception:
+            raise ValueError('Unexpected end of stream') from exception
+        if pos > len(buf):
+            raise ValueError('Unexpected end of stream')
+        return value
+
+
+_JSON_DECODER = Decoder()
+_JXON_DECODER = Decoder(allow_JSON=False)
+
+
+def _set_encoders(encoder, columns, float_mode):
+    """Chooses functions encoding types for columns and float_mode."""
+
+    encoder.columns = columns
+    encoder.encoders = _float_mode_encoders(float_mode)
+    if columns:
+        encoder.encoders = {**encoder.encoders, dict: _encode_dict_with_columns}
+
+
+def _encode_document(encoder, value, keys_table, auto_keys, stats):
+    if keys_table and auto_keys:
+        raise ValueError('keys_table and auto_keys can not be used together')
+    if auto_keys:
+        _encode_auto_keys(encoder, _count_keys(value))
+    elif keys_table:
+        _encode_keys_table(encoder, keys_table)
+    if stats is not None:
+        stats._start() # pylint: disable=protected-access
+        stats._encoder(encoder) # pylint: disable=protected-access
+        stats.counts['0xB?'] += len(encoder.keys) # puts of the table
+        stats.bytes['0xB?'] += len(encoder.out)
+    _encode_value(encoder, value)
+
+
+def encode(value, # pylint: disable=too-many-arguments,too-many-positional-arguments # public options
+           keys_table=None,
+           auto_keys=False,
+           columns=False,
+           float_mode='shortest',
+           stats=None,
+          ):
+    """Encodes the specified value as JXON and returns it as bytes.
+
+       Keys from keys_table are put to the table and encoded as references
+       to it. With auto_keys=True the encoder chooses keys for the table by
+       itself: it counts keys in the value and puts the ones saving the most
+       bytes. If more than 128 keys are worth it, the table is updated in the
+       middle of the value, replacing the least recently used keys.
+
+       With columns=True lists of two or more dicts with the same keys are
+       stored by columns: as object {"@columns": {key: [values...]}}, where
+       integer columns are encoded with the narrowest size fitting all of
+       them. decode(columns=True) converts them back to lists.
+
+       float_mode chooses how floats are encoded:
+           'shortest'   0xF7 if the float is a 32-bit float exactly, 0xF8 otherwise
+           'f64'        always 0xF8, without checking the value
+           'f32_lossy'  always 0xF7, rounded to the nearest 32-bit float
+       Floats of the same size are decoded in bulk by
+       decode(typed_arrays=...), 'f64' and 'f32_lossy' keep arrays of floats
+       typed even if some of them are not rounded to 32 bits.
+
+       stats is a Stats accumulating numbers, bytes and time of encoded
+       values by heads, see Stats.
+    """
+
+    encoder = _Encoder()
+    _set_encoders(encoder, columns, float_mode)
+    _encode_document(encoder, value, keys_table, auto_keys, stats)
+    return bytes(encoder.out)
+
+
+def dump(value, fp, # pylint: disable=too-many-arguments,too-many-positional-arguments # public options
+         keys_table=None,
+         auto_keys=False,
+         columns=False,
+         float_mode='shortest',
+         stats=None,
+        ):
+    """Encodes the specified value as JXON and writes it to binary file fp.
+
+       Encoded data is written in chunks of limited size while the value is
+       being encoded, so it is never kept in memory as a whole. keys_table,
+       auto_keys, columns, float_mode and stats are the same as for encode().
+    """
+
+    encoder = _Encoder(fp.write, _WRITE_SIZE)
+    _set_encoders(encoder, columns, float_mode)
+    _encode_document(encoder, value, keys_table, auto_keys, stats)
+    encoder.flush()
@@ -0,0 +1,738 @@
+"""Encoding of JXON values: the state of encoding, functions encoding every
+   type, keys tables and plans of classes.
+"""
+
+#
+#   Originally published to https://github.com/visualdoj/jxon
+#
+#   Author:  Doj
+#   License: Public domain or MIT
+#
+
+import array
+import collections
+import dataclasses
+import math
+import numbers
+import operator
+import sys
+import fractions
+
+from ._decoding import (
+    _BIGFLOAT_EXPONENT_LIMIT, _BIGINT_GROUP, _BIGINT_MASK, _BIGINT_MORE, _COLUMNS_KEY, _FLOAT32,
+    _HEAD_FLOAT32, _HEAD_FLOAT64, _HEAD_INT16, _HEAD_INT32, _HEAD_INT64, _HEAD_INT8, _MISSING,
+    _TYPED_ELEMENTS, _UINT64,
+)
+
+
+# size of chunks written to files
+_WRITE_SIZE = 64 * 1024
+
+
+class _Encoder: # pylint: disable=too-few-public-methods,too-many-instance-attributes # holds state only
+    """State of encoding: the output buffer and indexes of keys in the table.
+
+       Encoding functions below append encoded values to the end of out.
+       Objects and arrays pass out to write() every time it grows over
+       chunk_size.
+    """
+
+    __slots__ = ('out', 'keys', 'encode_key', 'columns', 'encoders', 'plans',
+                 'write', 'chunk_size')
+
+    def __init__(self, write=None, chunk_size=sys.maxsize):
+        self.out = bytearray()
+        self.keys = {}
+        self.encode_key = None # encodes keys if the table changes on the way
+        self.columns = False # arrays of objects are stored by columns
+        self.encoders = _VALUE_ENCODERS # type -> function encoding its instances
+        self.plans = False # other classes are encoded by plans, see Encoder
+        self.write = write
+        self.chunk_size = chunk_size
+
+    def flush(self):
+        """Passes encoded data to write() and empties the buffer."""
+
+        if self.out:
+            self.write(self.out)
+            self.out.clear()
+
+
+def _str_size(s):
+    """Returns size of the string encoded as 0xA? command."""
+
+    size = len(s.encode('utf-8'))
+    if size <= 9:
+        return size + 2
+    if size <= 127:
+        return size + 3
+    if size <= 32767:
+        return size + 4
+    if size <= 2147483647:
+        return size + 6
+    return size + 10
+
+
+def _count_keys(value):
+    """Returns dict with numbers of occurrences of keys in the value."""
+
+    counts = collections.Counter()
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            counts.update(key for key in value if isinstance(key, str))
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return counts
+
+
+class _AutoKeys: # pylint: disable=too-few-public-methods # used by encode_key only
+    """Keys table managed by the encoder, see encode(auto_keys=True).
+
+       Keys are ranked by bytes saved by putting them to the table. The
+       best ones are put to the table before the value. If there are more
+       than 128 keys worth it, the others are put to the table in the middle
+       of the value replacing least recently used keys, when they repeat
+       close enough to be likely used again before they are replaced.
+    """
+
+    def __init__(self, counts):
+        savings = {}
+        for key, count in counts.items():
+            size = _str_size(key)
+            # each use saves size - 1 bytes, the put costs size + 1 bytes
+            saving = count * (size - 1) - (size + 1)
+            if saving > 0:
+                savings[key] = saving
+        ranked = sorted(savings, key=savings.get, reverse=True)
+        self.initial = ranked[:128]
+        self.remaining = {key: counts[key] for key in ranked}
+        # key -> index, least recently used first
+        self.slots = collections.OrderedDict()
+        self.last_seen = {}
+        self.position = 0
+
+    def encode_key(self, out, key):
+        """Encodes the key as a reference to the table, putting it to the
+           table if needed, or as a string.
+        """
+
+        slots = self.slots
+        remaining = self.remaining.get(key, 0) - 1
+        if remaining >= 0:
+            self.remaining[key] = remaining
+        index = slots.get(key)
+        if index is not None:
+            if remaining > 0:
+                slots.move_to_end(key)
+            else:
+                slots.move_to_end(key, last=False) # not used anymore
+            out.append(index)
+        elif remaining > 0 and self.position - self.last_seen.get(key, -256) < 128:
+            if len(slots) < 128:
+                index = len(slots)
+            else:
+                index = slots.popitem(last=False)[1]
+            slots[key] = index
+            _encode_str(out, 0xB0, key)
+            out.append(index)
+            out.append(index)
+        else:
+            _encode_str(out, 0xA0, key)
+        self.last_seen[key] = self.position
+        self.position += 1
+
+
+def _encode_bigint(out, i):
+    """Appends BigInt, see _decode_bigint()."""
+
+    count = ((i if i >= 0 else ~i).bit_length() + 63) // 63 # with sign bit
+    if count == 1:
+        out += _UINT64.pack(i & _BIGINT_MASK)
+        return
+    groups = (count + 7) // 8
+    data = (i & ((1 << (63 * count)) - 1)).to_bytes(63 * groups, 'little')
+    mask = _BIGINT_MASK
+    more = _BIGINT_MORE
+    words = bytearray()
+    for start in range(0, 63 * groups, 63):
+        group = int.from_bytes(data[start:start + 63], 'little')
+        words += _BIGINT_GROUP.pack(*[(group >> shift) & mask | more
+                                      for shift in range(0, 504, 63)])
+    words[8 * count - 1] &= 0x7F # the last word
+    out += words[:8 * count]
+
+
+def _encode_bigfloat(out, numerator, denominator):
+    """Appends 0xF9 command: mantissa and binary exponent, denominator must
+       be a power of 2.
+    """
+
+    exponent = 1 - denominator.bit_length()
+    zeros = (numerator & -numerator).bit_length() - 1
+    if abs(exponent + zeros) > _BIGFLOAT_EXPONENT_LIMIT:
+        raise ValueError('exponent of large float is out of range')
+    out.append(0xF9)
+    _encode_bigint(out, numerator >> zeros)
+    _encode_bigint(out, exponent + zeros)
+
+
+def _encode_int_or_len(out, head, i):
+    if 0 <= i <= 9:
+        out.append(head | i)
+    elif i == -1:
+        out.append(head | 0x0F)
+    elif -128 <= i <= 127:
+        out += _HEAD_INT8.pack(head | 0x0A, i)
+    elif -32768 <= i <= 32767:
+        out += _HEAD_INT16.pack(head | 0x0B, i)
+    elif -2147483648 <= i <= 2147483647:
+        out += _HEAD_INT32.pack(head | 0x0C, i)
+    elif -9_223_372_036_854_775_808 <= i <= 9_223_372_036_854_775_807:
+        out += _HEAD_INT64.pack(head | 0x0D, i)
+    else:
+        out.append(head | 0x0E)
+        _encode_bigint(out, i)
+
+
+def _msb_lsb(i):
+    i = abs(operator.index(i)) # numpy integers have no bit_length()
+    return i.bit_length() - 1, (i & -i).bit_length() - 1
+
+
+def _encode_rational(out, numerator, denominator, r):
+    if numerator == 0:
+        out.append(0xF6)
+        return
+
+    if denominator & (denominator - 1) != 0:
+        raise ValueError('only rationals with denominators that are powers '
+                         'of 2 can be encoded')
+
+    exponent = operator.index(denominator).bit_length() - 1
+
+    # r == numerator * 2**(-exponent), binary exponents of the highest and
+    # the lowest set bits of r:
+    msb, lsb = _msb_lsb(numerator)
+    msb -= exponent
+    lsb -= exponent
+
+    # 32-bit float: 24 bits of mantissa, lowest denormalized bit is 2**(-149)
+    if msb <= 127 and lsb >= -149 and msb - lsb < 24:
+        out += _HEAD_FLOAT32.pack(0xF7, r)
+        return
+
+    # 64-bit float: 53 bits of mantissa, lowest denormalized bit is 2**(-1074)
+    if msb <= 1023 and lsb >= -1074 and msb - lsb < 53:
+        out += _HEAD_FLOAT64.pack(0xF8, r)
+        return
+
+    _encode_bigfloat(out, numerator, denominator)
+
+
+def _encode_float(out, f):
+    """Appends the float as 0xF6, as 0xF7 if it is representable as 32-bit
+       float exactly, or as 0xF8.
+    """
+
+    if f == 0.0:
+        out.append(0xF6)
+        return
+    try:
+        packed = _HEAD_FLOAT32.pack(0xF7, f)
+    except OverflowError: # out of range of 32-bit floats
+        out += _HEAD_FLOAT64.pack(0xF8, f)
+        return
+    if _FLOAT32.unpack_from(packed, 1)[0] == f or math.isnan(f):
+        out += packed
+    else:
+        out += _HEAD_FLOAT64.pack(0xF8, f)
+
+
+def _encode_float64(out, f):
+    out += _HEAD_FLOAT64.pack(0xF8, f)
+
+
+def _encode_float32_lossy(out, f):
+    try:
+        out += _HEAD_FLOAT32.pack(0xF7, f)
+    except OverflowError: # out of range of 32-bit floats
+        out += _HEAD_FLOAT32.pack(0xF7, math.copysign(math.inf, f))
+
+
+def _encode_str(out, head, s):
+    data = s.encode('utf-8')
+    _encode_int_or_len(out, head, len(data))
+    out += data
+    out.append(0)
+
+
+def _encode_blob(out, blob):
+    _encode_int_or_len(out, 0x90, len(blob))
+    out += blob
+
+
+def _encode_dict(encoder, document):
+    out = encoder.out
+    keys = encoder.keys
+    encode_key = encoder.encode_key
+    get_encoder = encoder.encoders.get
+    chunk_size = encoder.chunk_size
+    out.append(0xF3) # "start object" marker
+
+    for key, value in document.items():
+        if not isinstance(key, str):
+            raise TypeError("keys must be strings")
+        if encode_key is not None:
+            encode_key(out, key)
+        else:
+            index = keys.get(key)
+            if index is None:
+                _encode_str(out, 0xA0, key)
+            else:
+                out.append(index)
+        value_encoder = get_encoder(type(value))
+        if value_encoder is not None:
+            value_encoder(encoder, value)
+        else:
+            _encode_value(encoder, value)
+        if len(out) >= chunk_size:
+            encoder.flush()
+
+    out.append(0xF5) # "end object" marker
+
+
+# size of integers and floats -> head of elements of typed arrays
+_TYPED_INT_HEADS = {1: 0x8A, 2: 0x8B, 4: 0x8C, 8: 0x8D}
+_TYPED_FLOAT_HEADS = {4: 0xF7, 8: 0xF8}
+
+
+def _encode_typed_elements(encoder, head, size, data):
+    """Encodes array of elements of the same size, data is their little
+       endian representation.
+    """
+
+    stride = size + 1
+    count = len(data) // size
+    elements = bytearray(count * stride)
+    elements[0::stride] = bytes((head,)) * count
+    for i in range(size):
+        elements[1 + i::stride] = data[i::size]
+    out = encoder.out
+    out.append(0xF4) # "start array" marker
+    out += elements
+    out.append(0xF5) # "end array" marker
+    if len(out) >= encoder.chunk_size:
+        encoder.flush()
+
+
+def _encode_array_array(encoder, values):
+    typecode = values.typecode
+    size = values.itemsize
+    if typecode in 'BHIL' and size < 8:
+        # unsigned integers are encoded as signed ones of twice the size
+        size *= 2
+        values = array.array(_TYPED_ELEMENTS[_TYPED_INT_HEADS[size]][1], values)
+    elif typecode not in 'bhilqfd':
+        _encode_list(encoder, values.tolist())
+        return
+    if sys.byteorder != 'little':
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    heads = _TYPED_FLOAT_HEADS if typecode in 'fd' else _TYPED_INT_HEADS
+    _encode_typed_elements(encoder, heads[size], size, values.tobytes())
+
+
+def _encode_numpy_array(encoder, values):
+    if values.ndim == 0:
+        _encode_value(encoder, values.item())
+        return
+    if values.ndim > 1:
+        _encode_list(encoder, values)
+        return
+    kind = values.dtype.kind
+    size = values.dtype.itemsize
+    if kind == 'u' and size < 8:
+        # unsigned integers are encoded as signed ones of twice the size
+        kind = 'i'
+        size *= 2
+    heads = _TYPED_FLOAT_HEADS if kind == 'f' else _TYPED_INT_HEADS
+    if kind not in 'if' or size not in heads:
+        _encode_list(encoder, values.tolist())
+        return
+    data = values.astype(f'<{kind}{size}', copy=False).tobytes()
+    _encode_typed_elements(encoder, heads[size], size, data)
+
+
+def _int_column_typecode(column):
+    """Returns array.array typecode of the narrowest integers holding all
+       integers of the column, None if it has other values.
+    """
+
+    if not all(type(value) is int for value in column): # pylint: disable=unidiomatic-typecheck
+        return None
+    low = min(column)
+    high = max(column)
+    for size in (1, 2, 4, 8):
+        limit = 1 << (size * 8 - 1)
+        if -limit <= low and high < limit:
+            return _TYPED_ELEMENTS[_TYPED_INT_HEADS[size]][1]
+    return None
+
+
+def _encode_columns(encoder, records):
+    """Encodes list of objects with the same keys as object with the only
+       key _COLUMNS_KEY mapping the keys to arrays of values.
+    """
+
+    columns = {}
+    for key in records[0]:
+        column = [record[key] for record in records]
+        typecode = _int_column_typecode(column)
+        columns[key] = column if typecode is None else array.array(typecode, column)
+    _encode_dict(encoder, {_COLUMNS_KEY: columns})
+
+
+def _encode_dict_with_columns(encoder, document):
+    """Encodes dict for encode(columns=True), rejecting dicts that would be
+       decoded as arrays stored by columns.
+    """
+
+    if len(document) == 1 and isinstance(document.get(_COLUMNS_KEY), dict):
+        raise ValueError(f'object with the only key {_COLUMNS_KEY!r} can not be '
+                         'encoded with columns=True')
+    _encode_dict(encoder, document)
+
+
+def _encode_list(encoder, values):
+    if encoder.columns and len(values) > 1 and isinstance(values[0], dict) and values[0]:
+        keys = values[0].keys()
+        if all(isinstance(value, dict) and value.keys() == keys for value in values):
+            _encode_columns(encoder, values)
+            return
+
+    out = encoder.out
+    get_encoder = encoder.encoders.get
+    chunk_size = encoder.chunk_size
+    out.append(0xF4) # "start array" marker
+
+    for value in values:
+        value_encoder = get_encoder(type(value))
+        if value_encoder is not None:
+            value_encoder(encoder, value)
+        else:
+            _encode_value(encoder, value)
+        if len(out) >= chunk_size:
+            encoder.flush()
+
+    out.append(0xF5) # "end array" marker
+
+
+def _encode_value(encoder, value):
+    value_encoder = encoder.encoders.get(type(value))
+    if value_encoder is not None:
+        value_encoder(encoder, value)
+    elif value is None:
+        encoder.out.append(0xF0)
+    elif value is True:
+        encoder.out.append(0xF2)
+    elif value is False:
+        encoder.out.append(0xF1)
+    elif isinstance(value, str):
+        _encode_str(encoder.out, 0xA0, value)
+    elif isinstance(value, int):
+        _encode_int_or_len(encoder.out, 0x80, value)
+    elif isinstance(value, float):
+        encoder.encoders[float](encoder, value) # as float_mode says
+    elif isinstance(value, dict):
+        encoder.encoders[dict](encoder, value) # as columns says
+    elif isinstance(value, (list, tuple)):
+        _encode_list(encoder, value)
+    elif isinstance(value, numbers.Integral): # e.g. numpy integers
+        _encode_int_or_len(encoder.out, 0x80, operator.index(value))
+    elif isinstance(value, numbers.Rational):
+        _encode_rational(encoder.out, value.numerator, value.denominator, value)
+    elif isinstance(value, bytes):
+        _encode_blob(encoder.out, value)
+    elif isinstance(value, array.array):
+        _encode_array_array(encoder, value)
+    elif hasattr(value, '__array_interface__'): # numpy arrays and scalars
+        _encode_numpy_array(encoder, value)
+    else:
+        _encode_instance(encoder, value)
+
+
+def _encode_none(encoder, _value):
+    encoder.out.append(0xF0)
+
+
+def _encode_bool(encoder, value):
+    encoder.out.append(0xF2 if value else 0xF1)
+
+
+def _encode_str_value(encoder, value):
+    _encode_str(encoder.out, 0xA0, value)
+
+
+def _encode_int_value(encoder, value):
+    _encode_int_or_len(encoder.out, 0x80, value)
+
+
+def _encode_float_value(encoder, value):
+    _encode_float(encoder.out, value)
+
+
+def _encode_float64_value(encoder, value):
+    _encode_float64(encoder.out, value)
+
+
+def _encode_float32_lossy_value(encoder, value):
+    _encode_float32_lossy(encoder.out, value)
+
+
+def _encode_fraction(encoder, value):
+    _encode_rational(encoder.out, value.numerator, value.denominator, value)
+
+
+def _encode_bytes(encoder, value):
+    _encode_blob(encoder.out, value)
+
+
+# exact type -> encoding function, _encode_value() falls back to isinstance
+# checks for other types, e.g. subclasses
+_VALUE_ENCODERS = {
+    type(None): _encode_none,
+    bool: _encode_bool,
+    str: _encode_str_value,
+    int: _encode_int_value,
+    float: _encode_float_value,
+    dict: _encode_dict,
+    list: _encode_list,
+    tuple: _encode_list,
+    fractions.Fraction: _encode_fraction,
+    bytes: _encode_bytes,
+    array.array: _encode_array_array,
+}
+
+
+# float_mode -> encoders of values
+_FLOAT_MODES = {
+    'shortest': _VALUE_ENCODERS,
+    'f64': {**_VALUE_ENCODERS, float: _encode_float64_value},
+    'f32_lossy': {**_VALUE_ENCODERS, float: _encode_float32_lossy_value},
+}
+
+
+def _float_mode_encoders(float_mode):
+    try:
+        return _FLOAT_MODES[float_mode]
+    except KeyError:
+        raise ValueError('float_mode must be "shortest", "f64" or "f32_lossy"') from None
+
+
+def _encode_keys_table(encoder, keys_table):
+    for index, key in enumerate(keys_table):
+        if index > 127:
+            break
+        encoder.keys[key] = index
+        _encode_str(encoder.out, 0xB0, key)
+        encoder.out.append(index)
+
+
+def _encode_auto_keys(encoder, counts):
+    """Puts keys chosen by _AutoKeys to the table, counts is dict with
+       numbers of occurrences of keys.
+    """
+
+    table = _AutoKeys(counts)
+    _encode_keys_table(encoder, table.initial)
+    if len(table.remaining) > 128:
+        # the most valuable keys are evicted last
+        table.slots.update(reversed(list(encoder.keys.items())))
+        encoder.encode_key = table.encode_key
+
+
+def dump_events(events, fp,
+                keys_table=None,
+                key_counts=None,
+                float_mode='shortest',
+               ):
+    """Encodes events as yielded by iterparse() or iterparse_json() to JXON
+       and writes it to binary file fp in chunks, without building python
+       values. Table puts from the events are dropped, keys are encoded
+       according to the table of the output.
+
+       Every top-level value is encoded as by a separate dump() call: the
+       table is put before each of them, so they do not depend on puts made
+       in the previous ones.
+
+       key_counts is dict with numbers of occurrences of keys in a top-level
+       value, e.g. averages counted by a previous pass over the events, the
+       table is chosen with it as with encode(auto_keys=True). keys_table
+       and float_mode are the same as for encode().
+    """
+
+    if keys_table and key_counts:
+        raise ValueError('keys_table and key_counts can not be used together')
+
+    def make_table():
+        table = _Encoder()
+        if key_counts:
+            _encode_auto_keys(table, key_counts)
+        elif keys_table:
+            _encode_keys_table(table, keys_table)
+        return table # puts are in table.out
+
+    encoder = _Encoder(fp.write, _WRITE_SIZE)
+    encoder.encoders = _float_mode_encoders(float_mode)
+    out = encoder.out
+    table = keys = encode_key = None
+    depth = 0
+    for event, value, _ in events:
+        if depth == 0 and event != 'table_put': # next top-level value
+            # the table updated on the way starts over for every value
+            if table is None or table.encode_key is not None:
+                table = make_table()
+            out += table.out
+            keys = table.keys
+            encode_key = table.encode_key
+        if event == 'scalar':
+            _encode_value(encoder, value)
+        elif event == 'key':
+            if encode_key is not None:
+                encode_key(out, value)
+            else:
+                index = keys.get(value)
+                if index is None:
+                    _encode_str(out, 0xA0, value)
+                else:
+                    out.append(index)
+        elif event == 'start_object':
+            out.append(0xF3)
+            depth += 1
+        elif event == 'start_array':
+            out.append(0xF4)
+            depth += 1
+        elif event == 'end':
+            out.append(0xF5)
+            depth -= 1
+        if len(out) >= _WRITE_SIZE:
+            encoder.flush()
+    encoder.flush()
+
+
+def _object_fields(cls):
+    """Returns names of fields of instances of the class: fields of
+       dataclasses or slots of classes with __slots__, None for other classes.
+    """
+
+    if dataclasses.is_dataclass(cls):
+        return [field.name for field in dataclasses.fields(cls)]
+    names = []
+    for base in reversed(cls.__mro__[:-1]):
+        slots = base.__dict__.get('__slots__')
+        if slots is None: # instances have __dict__
+            return None
+        if isinstance(slots, str):
+            slots = (slots,)
+        names += [name for name in slots if name not in names]
+    if not names or '__dict__' in names:
+        return None
+    return [name for name in names if name != '__weakref__']
+
+
+def _compile_plan(cls, keys):
+    """Returns function encoding instances of the class as objects, with keys
+       encoded beforehand, or None if the class is not supported.
+    """
+
+    names = _object_fields(cls)
+    if names is None:
+        return None
+    encoded_keys = []
+    for name in names:
+        key = bytearray()
+        index = keys.get(name)
+        if index is None:
+            _encode_str(key, 0xA0, name)
+        else:
+            key.append(index)
+        encoded_keys.append(bytes(key))
+    fields = list(zip(names, encoded_keys))
+    get_values = operator.attrgetter(*names) if len(names) > 1 else (
+        lambda obj: (getattr(obj, names[0]),))
+
+    def encode_object(encoder, obj):
+        out = encoder.out
+        out.append(0xF3) # "start object" marker
+        try:
+            values = get_values(obj)
+        except AttributeError: # unset slots are skipped
+            for name, key in fields:
+                value = getattr(obj, name, _MISSING)
+                if value is not _MISSING:
+                    out += key
+                    _encode_value(encoder, value)
+        else:
+            for key, value in zip(encoded_keys, values):
+                out += key
+                _encode_value(encoder, value)
+        out.append(0xF5) # "end object" marker
+
+    return encode_object
+
+
+def _encode_instance(encoder, value):
+    encoders = encoder.encoders
+    plan = None
+    if encoder.plans: # custom types are accepted
+        plan = _compile_plan(type(value), encoder.keys)
+    if plan is None:
+        raise TypeError("value must be json-like value")
+    encoders[type(value)] = plan
+    plan(encoder, value)
+
+
+class Encoder:
+    """Reusable encoder also accepting instances of dataclasses and classes
+       with __slots__, they are encoded as objects of their fields.
+
+       For every class a plan is compiled once: the list of its fields with
+       keys encoded beforehand, as references to keys_table or as strings.
+       Instances are encoded by the plan without converting them to dicts.
+
+       float_mode is the same as for jxon.encode().
+    """
+
+    def __init__(self, keys_table=None, float_mode='shortest'):
+        encoder = _Encoder()
+        _encode_keys_table(encoder, keys_table or ())
+        self._header = bytes(encoder.out) # puts of keys_table
+        self._keys = encoder.keys
+        self._encoders = dict(_float_mode_encoders(float_mode)) # with plans of classes
+
+    def _encoder(self, write=None, chunk_size=sys.maxsize):
+        encoder = _Encoder(write, chunk_size)
+        encoder.out += self._header
+        encoder.keys = self._keys
+        encoder.encoders = self._encoders
+        encoder.plans = True
+        return encoder
+
+    def encode(self, value):
+        """Encodes the value as JXON and returns it as bytes."""
+
+        encoder = self._encoder()
+        _encode_value(encoder, value)
+        return bytes(encoder.out)
+
+    def dump(self, value, fp):
+        """Encodes the value as JXON and writes it to binary file fp in
+           chunks, see jxon.dump().
+        """
+
+        encoder = self._encoder(fp.write, _WRITE_SIZE)
+        _encode_value(encoder, value)
+        encoder.flush()
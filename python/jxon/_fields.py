@@ -0,0 +1,257 @@
+"""Skipping values by their sizes and decoding of selected fields.
+"""
+
+#
+#   Originally published to https://github.com/visualdoj/jxon
+#
+#   Author:  Doj
+#   License: Public domain or MIT
+#
+
+# pylint: disable=duplicate-code # loops over keys are inlined for speed like in _decoding
+
+import sys
+
+from ._decoding import _decode_put, _decode_string, _MISSING, _VALUE_DECODERS
+from ._streams import _token_end
+
+
+def _skip_put(decoder, head, pos):
+    """Like _decode_put, but replaces the table with a modified copy.
+
+       Previous table may be referenced by lazy values.
+    """
+
+    decoder.table = list(decoder.table)
+    return _decode_put(decoder, head, pos)
+
+
+def _make_skip_sizes():
+    """Returns list of sizes of arguments for heads followed by fixed number
+       of bytes, and -1 for other heads.
+    """
+
+    sizes = [-1] * 256
+    sizes[0x00:0x80] = [0] * 0x80 # keys from the table
+    sizes[0x80:0x8A] = [0] * 10
+    sizes[0x8A:0x8E] = [1, 2, 4, 8]
+    sizes[0x8F] = 0
+    sizes[0x90:0x9A] = range(10)
+    sizes[0xA0:0xAA] = range(1, 11) # with null character
+    sizes[0xF0:0xF3] = [0, 0, 0]
+    sizes[0xF6:0xF9] = [0, 4, 8]
+    return sizes
+
+_SKIP_SIZES = _make_skip_sizes()
+
+
+def _skip_value(decoder, head, pos):
+    """Returns offset right after the value without decoding it.
+
+       Lengths of strings and BLOBs are used to jump over them, objects and
+       arrays are walked only for counting nesting. Table puts are applied
+       with _skip_put.
+    """
+
+    if head < 0x80 or head == 0xF5:
+        _VALUE_DECODERS[head](decoder, head, pos) # raises ValueError
+    buf = decoder.buf
+    sizes = _SKIP_SIZES
+    depth = 0
+    while True:
+        size = sizes[head]
+        if size >= 0:
+            pos += size
+        elif head == 0xAA and buf[pos] < 0x80:
+            pos += buf[pos] + 2 # size and null character
+        elif head in (0xF3, 0xF4):
+            depth += 1
+        elif head == 0xF5:
+            depth -= 1
+        elif head & 0xF0 == 0xB0:
+            pos = _skip_put(decoder, head, pos)
+            head = buf[pos]
+            pos += 1
+            continue
+        elif 0x80 <= head < 0xB0 or head == 0xF9:
+            pos = _token_end(buf, head, pos, len(buf))
+            if pos is None:
+                raise ValueError('Unexpected end of stream')
+        else:
+            pos = _VALUE_DECODERS[head](decoder, head, pos)[1]
+        if depth == 0:
+            return pos
+        head = buf[pos]
+        pos += 1
+
+
+def _compile_fields(fields):
+    """Returns tree of paths for decode(fields=...).
+
+       The tree is a dict mapping keys, indexes and '*' to subtrees, None
+       selects the whole value.
+    """
+
+    if not any(isinstance(path, (list, tuple)) for path in fields):
+        fields = [fields] # single path
+    tree = {}
+    for path in fields:
+        if not path:
+            return None
+        node = tree
+        for step in path[:-1]:
+            child = node.get(step, _MISSING)
+            if child is None:
+                break # the whole value is already selected
+            if child is _MISSING:
+                child = node[step] = {}
+            node = child
+        else:
+            node[path[-1]] = None
+    return tree
+
+
+def _merge_fields(tree1, tree2):
+    if tree1 is None or tree2 is None:
+        return None
+    merged = dict(tree1)
+    for step, child in tree2.items():
+        merged[step] = _merge_fields(merged[step], child) if step in merged else child
+    return merged
+
+
+def _select_field(tree, step):
+    """Returns subtree for the key or index, _MISSING if it is not selected."""
+
+    child = tree.get(step, _MISSING)
+    wildcard = tree.get('*', _MISSING)
+    if wildcard is _MISSING:
+        return child
+    if child is _MISSING:
+        return wildcard
+    return _merge_fields(child, wildcard)
+
+
+def _field_selector(tree):
+    """Returns function taking a key or index and a default, it returns the
+       subtree selected by them like _select_field, or the default.
+    """
+
+    wildcard = tree.get('*', _MISSING)
+    if wildcard is _MISSING:
+        return tree.get
+    if len(tree) == 1:
+        def select_wildcard(_step, _default):
+            return wildcard
+        return select_wildcard
+    def select(step, _default):
+        return _select_field(tree, step)
+    return select
+
+
+def _decode_key(decoder, head, pos):
+    """Decodes key of an object that is not a reference to the table or a
+       short string.
+
+       Returns None instead of the key for a table put.
+    """
+
+    if head & 0xF0 == 0xA0:
+        key, pos = _decode_string(decoder, head, pos)
+        return sys.intern(key), pos
+    if head & 0xF0 == 0xB0:
+        return None, _decode_put(decoder, head, pos)
+    raise ValueError('key must be string')
+
+
+def _decode_selected(decoder, head, pos, tree):
+    """Decodes the parts of the value selected by tree.
+
+       Returns _MISSING instead of scalars, they can not have selected
+       parts. Values that are not selected are skipped, not decoded.
+    """
+
+    buf = decoder.buf
+    while head & 0xF0 == 0xB0:
+        pos = _decode_put(decoder, head, pos)
+        head = buf[pos]
+        pos += 1
+    if head not in (0xF3, 0xF4):
+        return _MISSING, _skip_value(decoder, head, pos)
+
+    decoders = decoder.decoders
+    skip_sizes = _SKIP_SIZES
+    utf8_decode = decoder.utf8_decode
+    intern = sys.intern
+    select = _field_selector(tree)
+    is_object = head == 0xF3
+    result = {} if is_object else []
+    index = 0
+    while True:
+        head = buf[pos]
+        pos += 1
+        if head == 0xF5:
+            return result, pos
+        if is_object:
+            if head < 0x80:
+                key = decoder.table[head]
+            elif 0xA0 <= head <= 0xA9:
+                end = pos + head - 0xA0
+                key = intern(utf8_decode(buf[pos:end], None, True)[0])
+                pos = end + 1 # skip null character
+            else:
+                key, pos = _decode_key(decoder, head, pos)
+                if key is None:
+                    continue
+            head = buf[pos]
+            pos += 1
+        else:
+            key = index
+            index += 1
+        child = select(key, _MISSING)
+
+        if child is _MISSING:
+            size = skip_sizes[head]
+            if size >= 0 and head >= 0x80:
+                pos += size
+            elif head == 0xAA and buf[pos] < 0x80:
+                pos += buf[pos] + 2 # size and null character
+            else:
+                pos = _skip_value(decoder, head, pos)
+            continue
+        if child is None:
+            value, pos = decoders[head](decoder, head, pos)
+        else:
+            value, pos = _decode_selected(decoder, head, pos, child)
+            if value is _MISSING:
+                continue
+        if is_object:
+            result[key] = value
+        else:
+            result.append(value)
+
+
+def _select_python_value(value, tree):
+    """Like _decode_selected, but for decoded value."""
+
+    if isinstance(value, dict):
+        items = value.items()
+        result = {}
+    elif isinstance(value, list):
+        items = enumerate(value)
+        result = []
+    else:
+        return _MISSING
+    for key, item in items:
+        child = _select_field(tree, key)
+        if child is _MISSING:
+            continue
+        if child is not None:
+            item = _select_python_value(item, child)
+            if item is _MISSING:
+                continue
+        if isinstance(result, dict):
+            result[key] = item
+        else:
+            result.append(item)
+    return result
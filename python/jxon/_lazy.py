@@ -0,0 +1,206 @@
+"""Lazy views of objects and arrays, see decode_lazy().
+"""
+
+#
+#   Originally published to https://github.com/visualdoj/jxon
+#
+#   Author:  Doj
+#   License: Public domain or MIT
+#
+
+# pylint: disable=duplicate-code # loops over keys are inlined like in _decoding
+
+import collections.abc
+import struct
+import sys
+
+from ._decoding import _decode_string, _Decoder, _MISSING, _VALUE_DECODERS
+from ._fields import _skip_put, _skip_value
+
+
+def _decode_lazy_value(buf, pos, table):
+    """Decodes scalar at pos or returns lazy view of object or array."""
+
+    decoder = _Decoder(buf, table)
+    try:
+        head = buf[pos]
+        while head & 0xF0 == 0xB0:
+            pos = _skip_put(decoder, head, pos + 1)
+            head = buf[pos]
+        if head == 0xF3:
+            return LazyObject(buf, pos + 1, decoder.table)
+        if head == 0xF4:
+            return LazyArray(buf, pos + 1, decoder.table)
+        value, pos = _VALUE_DECODERS[head](decoder, head, pos + 1)
+    except (IndexError, struct.error) as exception:
+        raise ValueError('Unexpected end of stream') from exception
+    if pos > len(buf):
+        raise ValueError('Unexpected end of stream')
+    return value
+
+
+class LazyObject(collections.abc.Mapping):
+    """Read-only view of JXON object, see decode_lazy().
+
+       Keys are looked for on access, the object is walked only as far as
+       needed. Values are decoded on access and cached.
+    """
+
+    __slots__ = ('_buf', '_pos', '_table', '_spans', '_cache')
+
+    def __init__(self, buf, pos, table):
+        self._buf = buf      # the whole document
+        self._pos = pos      # offset right after the 0xF3 head
+        self._table = table  # keys table at _pos
+        self._spans = {}     # key -> (offset of value, keys table at it)
+        self._cache = {}
+
+    def _scan(self, wanted=_MISSING):
+        """Walks the object until wanted key is found or until its end."""
+
+        decoder = _Decoder(self._buf, self._table)
+        buf = self._buf
+        pos = self._pos
+        spans = self._spans
+        try:
+            while pos is not None:
+                head = buf[pos]
+                pos += 1
+                if head < 0x80:
+                    key = decoder.table[head]
+                elif head == 0xF5:
+                    pos = None
+                    break
+                elif head & 0xF0 == 0xA0:
+                    key, pos = _decode_string(decoder, head, pos)
+                elif head & 0xF0 == 0xB0:
+                    pos = _skip_put(decoder, head, pos)
+                    continue
+                else:
+                    raise ValueError('key must be string')
+                spans.setdefault(key, (pos, decoder.table))
+                pos = _skip_value(decoder, buf[pos], pos + 1)
+                if key == wanted:
+                    break
+        except (IndexError, struct.error) as exception:
+            raise ValueError('Unexpected end of stream') from exception
+        self._pos = pos
+        self._table = decoder.table
+
+    def _scan_all(self):
+        if self._pos is not None:
+            self._scan()
+        return self._spans
+
+    def __getitem__(self, key):
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        if key not in self._spans:
+            self._scan(key)
+        pos, table = self._spans[key]
+        value = self._cache[key] = _decode_lazy_value(self._buf, pos, table)
+        return value
+
+    def __contains__(self, key):
+        if key not in self._spans:
+            self._scan(key)
+        return key in self._spans
+
+    def __iter__(self):
+        return iter(self._scan_all())
+
+    def __len__(self):
+        return len(self._scan_all())
+
+    def __repr__(self):
+        return f'LazyObject({dict(self)!r})'
+
+
+class LazyArray(collections.abc.Sequence):
+    """Read-only view of JXON array, see decode_lazy().
+
+       Elements are looked for on access, the array is walked only as far
+       as needed. Elements are decoded on access and cached.
+    """
+
+    __slots__ = ('_buf', '_pos', '_table', '_spans', '_cache')
+
+    def __init__(self, buf, pos, table):
+        self._buf = buf      # the whole document
+        self._pos = pos      # offset right after the 0xF4 head
+        self._table = table  # keys table at _pos
+        self._spans = []     # (offset of element, keys table at it)
+        self._cache = []
+
+    def _scan(self, wanted=sys.maxsize):
+        """Walks the array until the wanted index is found or until its end."""
+
+        decoder = _Decoder(self._buf, self._table)
+        buf = self._buf
+        pos = self._pos
+        spans = self._spans
+        try:
+            head = buf[pos]
+            while head != 0xF5 and len(spans) <= wanted:
+                spans.append((pos, decoder.table))
+                pos = _skip_value(decoder, head, pos + 1)
+                head = buf[pos]
+        except (IndexError, struct.error) as exception:
+            raise ValueError('Unexpected end of stream') from exception
+        self._pos = pos if head != 0xF5 else None
+        self._table = decoder.table
+        self._cache += [_MISSING] * (len(spans) - len(self._cache))
+
+    def _scan_all(self):
+        if self._pos is not None:
+            self._scan()
+        return self._spans
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        elif index >= len(self._spans) and self._pos is not None:
+            self._scan(index)
+        if not 0 <= index < len(self._spans):
+            raise IndexError('LazyArray index out of range')
+        value = self._cache[index]
+        if value is _MISSING:
+            pos, table = self._spans[index]
+            value = self._cache[index] = _decode_lazy_value(self._buf, pos, table)
+        return value
+
+    def __len__(self):
+        return len(self._scan_all())
+
+    def __eq__(self, other):
+        if not isinstance(other, (list, LazyArray)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f'LazyArray({list(self)!r})'
+
+
+def decode_lazy(data):
+    """Decodes JXON lazily, only the parts that are accessed.
+
+       Objects and arrays are returned as read-only LazyObject and LazyArray
+       (collections.abc.Mapping and collections.abc.Sequence). They are
+       walked only as far as needed to find the requested key or index,
+       skipping other values by their sizes. Nested objects and arrays are
+       lazy as well, decoded values are cached.
+
+       If an object has several values for the same key, the first one is
+       used (unlike decode(), which keeps the last one).
+
+       data is referenced by the returned views and must not be modified.
+    """
+
+    decoder = _Decoder(data)
+    return _decode_lazy_value(decoder.buf, 0, decoder.table)
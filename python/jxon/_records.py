@@ -0,0 +1,254 @@
+"""Index of a document and streams of records in files.
+"""
+
+#
+#   Originally published to https://github.com/visualdoj/jxon
+#
+#   Author:  Doj
+#   License: Public domain or MIT
+#
+
+import bisect
+import concurrent.futures
+import mmap
+import os
+import struct
+
+from ._decoding import _Decoder, _VALUE_DECODERS
+from ._fields import _skip_value
+from ._streams import _iterparse, load
+from ._document import dump
+
+
+class Index:
+    """Offsets of objects and arrays in a JXON document, see build_index().
+
+       For every object the index keeps offsets of its values by keys, for
+       every array offsets of its elements. Offsets of table puts are kept
+       as well, so the keys table for any offset can be restored.
+    """
+
+    def __init__(self, roots, containers, puts):
+        self.roots = roots            # offsets of top-level values
+        self.containers = containers  # offset -> (end offset, children),
+                                      # children is dict for objects and
+                                      # list for arrays
+        self.puts = puts              # (offset, index, string) in order
+        self._put_offsets = [put[0] for put in puts]
+
+    def find(self, path, root=0):
+        """Returns offset of the value found by path from the specified
+           top-level value.
+
+           path is a sequence of keys and indexes.
+        """
+
+        offset = self.roots[root]
+        for step in path:
+            container = self.containers.get(offset)
+            if container is None:
+                raise TypeError('path goes through a scalar')
+            offset = container[1][step]
+        return offset
+
+    def table_at(self, offset):
+        """Returns the keys table as it is at the specified offset."""
+
+        table = [''] * 128
+        for _, index, s in self.puts[:bisect.bisect_left(self._put_offsets, offset)]:
+            table[index] = s
+        return table
+
+    def decode(self, data, path=(), root=0):
+        """Decodes the value found by path in the indexed data."""
+
+        offset = self.find(path, root)
+        decoder = _Decoder(data, self.table_at(offset))
+        head = decoder.buf[offset]
+        try:
+            return _VALUE_DECODERS[head](decoder, head, offset + 1)[0]
+        except (IndexError, struct.error) as exception:
+            raise ValueError('Unexpected end of stream') from exception
+
+    def dump(self, fp):
+        """Writes the index as JXON to binary file fp."""
+
+        dump({'roots': self.roots,
+              'containers': [[offset, end, children]
+                             for offset, (end, children) in self.containers.items()],
+              'puts': [list(put) for put in self.puts]},
+             fp, keys_table=['roots', 'containers', 'puts'])
+
+    @classmethod
+    def load(cls, fp):
+        """Reads the index written by Index.dump() from binary file fp."""
+
+        value = load(fp, allow_JSON=False)
+        return cls(value['roots'],
+                   {offset: (end, children)
+                    for offset, end, children in value['containers']},
+                   [tuple(put) for put in value['puts']])
+
+
+def build_index(source):
+    """Walks JXON document once and returns its Index.
+
+       source is either a buffer or a binary file object, as for iterparse().
+       Scalars are skipped by their sizes, not decoded.
+    """
+
+    roots = []
+    containers = {}
+    puts = []
+    stack = []  # [offset, children, key] for open objects and arrays
+    for event, value, offset in _iterparse(source, False):
+        if event == 'key':
+            stack[-1][2] = value
+            continue
+        if event == 'table_put':
+            puts.append((offset, value[0], value[1]))
+            continue
+        if event == 'end':
+            start, children, _ = stack.pop()
+            containers[start] = (offset + 1, children)
+            continue
+        if not stack:
+            roots.append(offset)
+        elif stack[-1][2] is None:
+            stack[-1][1].append(offset)
+        else:
+            stack[-1][1][stack[-1][2]] = offset
+            stack[-1][2] = None
+        if event == 'start_object':
+            stack.append([offset, {}, None])
+        elif event == 'start_array':
+            stack.append([offset, [], None])
+    return Index(roots, containers, puts)
+
+
+def _iter_records(buf, start, end, table=None):
+    """Yields values of records stored in buf[start:end] one after another.
+
+       table is the keys table at start, empty by default.
+    """
+
+    decoder = _Decoder(buf, table)
+    buf = decoder.buf
+    pos = start
+    try:
+        while pos < end:
+            head = buf[pos]
+            value, pos = _VALUE_DECODERS[head](decoder, head, pos + 1)
+            if pos > end:
+                raise ValueError('Unexpected end of stream')
+            yield value
+    except (IndexError, struct.error) as exception:
+        raise ValueError('Unexpected end of stream') from exception
+    finally:
+        if isinstance(buf, memoryview):
+            buf.release()
+
+
+def _split_records(buf, pieces):
+    """Skips records in buf and splits it into about the given number of
+       pieces of the same size at record boundaries.
+
+       Returns list of (offset, keys table at the offset) for starts of the
+       pieces followed by (size of buf, None).
+    """
+
+    decoder = _Decoder(buf)
+    buf = decoder.buf
+    size = len(buf)
+    splits = []
+    pos = 0
+    try:
+        while pos < size:
+            if pos * pieces >= len(splits) * size:
+                # _skip_put replaces the table, so the list is not changed
+                splits.append((pos, decoder.table))
+            pos = _skip_value(decoder, buf[pos], pos + 1)
+    except (IndexError, struct.error) as exception:
+        raise ValueError('Unexpected end of stream') from exception
+    finally:
+        if isinstance(buf, memoryview):
+            buf.release()
+    if pos > size:
+        raise ValueError('Unexpected end of stream')
+    splits.append((size, None))
+    return splits
+
+
+def _offsets_splits(offsets, size, pieces):
+    """Like _split_records, but uses the given offsets of records that do
+       not refer to table puts before them instead of skipping records.
+    """
+
+    offsets = sorted(offsets)
+    starts = {0}
+    for i in range(1, pieces):
+        index = bisect.bisect_right(offsets, size * i // pieces) - 1
+        if index >= 0 and 0 < offsets[index] < size:
+            starts.add(offsets[index])
+    return [(start, None) for start in sorted(starts)] + [(size, None)]
+
+
+def iter_file(path):
+    """Reads a record stream from the file and yields its values one by one.
+
+       A record stream is a sequence of JXON values written one after
+       another, e.g. with jxon.dump() calls on the same file, they share the
+       keys table as described in Parser. The file is mapped to memory, so
+       only the values being yielded are kept in memory.
+    """
+
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            yield from _iter_records(buf, 0, len(buf))
+
+
+def _decode_file_range(path, start, end, table):
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            return list(_iter_records(buf, start, end, table))
+
+
+def decode_file_parallel(path, workers=None, offsets=None):
+    """Decodes all values of a record stream file, see iter_file(), in a
+       pool of worker processes and returns them as a list.
+
+       The file is split into pieces of about the same size at record
+       boundaries. Workers receive only the path, offsets of their pieces
+       and keys tables at their starts, and map the file by themselves.
+       workers is the number of processes, os.cpu_count() by default.
+
+       offsets lists offsets of records that do not refer to table puts
+       made before them, e.g. f.tell() before each dump() call saved next
+       to the file. The file is split only at them, so it is not read before
+       decoding. Without offsets the parent skips all records to find the
+       boundaries and the tables.
+    """
+
+    workers = workers or os.cpu_count() or 1
+    # a few pieces per worker even out differences in decoding speed
+    pieces = workers * 4
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return []
+        if workers == 1:
+            return list(iter_file(path))
+        if offsets is not None:
+            splits = _offsets_splits(offsets, size, pieces)
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                splits = _split_records(buf, pieces)
+
+    starts, tables = zip(*splits[:-1])
+    ends = [split[0] for split in splits[1:]]
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        results = executor.map(_decode_file_range,
+                               [path] * len(starts), starts, ends, tables)
+        return [value for values in results for value in values]
@@ -0,0 +1,175 @@
+"""Sessions keeping the keys table between messages and asyncio streams.
+"""
+
+#
+#   Originally published to https://github.com/visualdoj/jxon
+#
+#   Author:  Doj
+#   License: Public domain or MIT
+#
+
+# pylint: disable=duplicate-code # messages are decoded like by Decoder.decode()
+
+import array
+import asyncio
+import struct
+import functools
+
+from ._decoding import _Decoder, _VALUE_DECODERS
+from ._encoding import _encode_str, _encode_value, _Encoder
+from ._streams import Parser
+from ._document import encode
+
+
+_EXECUTOR_THRESHOLD = 256 * 1024 # see aiter_values() and awrite()
+_ASYNC_READ_SIZE = 16 * 1024 # parsing one chunk blocks the event loop for a few ms
+
+
+class Session:
+    """Keys table kept across many messages, e.g. on one connection.
+
+       encode() puts keys new to the session to free slots of the table on
+       their first use, the following messages refer to them by one byte.
+       When all 128 slots are taken, other keys are written as strings.
+       decode() decodes messages encoded by encode() of the session on the
+       other side, in the same order, keeping table puts between calls.
+
+       Encoding and decoding use separate tables, so one session serves both
+       directions of a connection. keys_table lists keys known to both sides
+       beforehand, they are used without being put.
+    """
+
+    def __init__(self, keys_table=None):
+        keys_table = list(keys_table or ())[:128]
+        self._keys = {key: index for index, key in enumerate(keys_table)}
+        self._table = keys_table + [''] * (128 - len(keys_table))
+
+    def _encode_key(self, out, key, added):
+        keys = self._keys
+        index = keys.get(key)
+        if index is None:
+            if len(keys) == 128:
+                _encode_str(out, 0xA0, key)
+                return
+            index = len(keys)
+            keys[key] = index
+            added.append(key)
+            _encode_str(out, 0xB0, key)
+            out.append(index)
+        out.append(index)
+
+    def encode(self, value):
+        """Encodes the value as the next message and returns it as bytes."""
+
+        encoder = _Encoder()
+        added = []
+        encoder.encode_key = lambda out, key: self._encode_key(out, key, added)
+        try:
+            _encode_value(encoder, value)
+        except BaseException:
+            # the message is not sent, so the peer never sees its puts
+            for key in added:
+                del self._keys[key]
+            raise
+        return bytes(encoder.out)
+
+    def decode(self, data):
+        """Decodes the next message and returns it as a python value."""
+
+        decoder = _Decoder(data, self._table)
+        buf = decoder.buf
+        try:
+            head = buf[0]
+            value, pos = _VALUE_DECODERS[head](decoder, head, 1)
+        except (IndexError, struct.error) as exception:
+            raise ValueError('Unexpected end of stream') from exception
+        if pos > len(buf):
+            raise ValueError('Unexpected end of stream')
+        return value
+
+
+async def aiter_values(reader, executor_threshold=_EXECUTOR_THRESHOLD, executor=None):
+    """Yields top-level values read from asyncio.StreamReader as soon as
+       they are complete, until the end of the stream, see Parser.
+
+       Input is parsed in small chunks as it arrives. When the input to parse
+       reaches executor_threshold bytes, e.g. a large string is complete,
+       it is parsed in executor (the default one of the loop if None), so
+       the event loop is not blocked.
+    """
+
+    loop = asyncio.get_running_loop()
+    parser = Parser()
+    while True:
+        data = await reader.read(_ASYNC_READ_SIZE)
+        if not data:
+            break
+        if parser._size + len(data) >= executor_threshold: # pylint: disable=protected-access
+            values = await loop.run_in_executor(executor, parser.feed, data)
+        else:
+            values = parser.feed(data)
+            # chunks buffered by the reader are returned without waiting,
+            # let other tasks run between them
+            await asyncio.sleep(0)
+        for value in values:
+            yield value
+    parser.close()
+
+
+def _exceeds_cost(value, limit):
+    """Returns True if encoding the value is likely to cost more than
+       encoding limit bytes of strings.
+
+       Every value is counted as 16 bytes, strings and BLOBs also by their
+       sizes. At most limit // 16 values are visited.
+    """
+
+    cost = 16
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, (str, bytes, bytearray)):
+            cost += len(value)
+        elif isinstance(value, dict):
+            cost += 16 * len(value)
+            if cost <= limit:
+                stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            cost += 16 * len(value)
+            if cost <= limit:
+                stack.extend(value)
+        elif isinstance(value, array.array):
+            cost += len(value) * value.itemsize
+        elif hasattr(value, 'nbytes'): # numpy arrays
+            cost += value.nbytes
+        if cost > limit:
+            return True
+    return False
+
+
+async def awrite(writer, value, # pylint: disable=too-many-arguments,too-many-positional-arguments # public options
+                 keys_table=None,
+                 auto_keys=False,
+                 columns=False,
+                 float_mode='shortest',
+                 executor_threshold=_EXECUTOR_THRESHOLD,
+                 executor=None,
+                ):
+    """Encodes the value, writes it to asyncio.StreamWriter and waits until
+       the writer drains its buffer, so a slow peer holds the sender back.
+
+       Values that would take more than about executor_threshold bytes are
+       encoded in executor (the default one of the loop if None), so the
+       event loop is not blocked. Other options are the same as for
+       encode(), values written one after another are read by
+       aiter_values().
+    """
+
+    if _exceeds_cost(value, executor_threshold):
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(executor, functools.partial(
+            encode, value, keys_table, auto_keys, columns, float_mode))
+    else:
+        data = encode(value, keys_table, auto_keys, columns, float_mode)
+    writer.write(data)
+    await writer.drain()
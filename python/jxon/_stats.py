@@ -0,0 +1,258 @@
+"""Counters of decoded and encoded values, see Stats.
+"""
+
+#
+#   Originally published to https://github.com/visualdoj/jxon
+#
+#   Author:  Doj
+#   License: Public domain or MIT
+#
+
+# pylint: disable=duplicate-code # Stats mirrors the decoding functions it counts
+
+import collections
+import sys
+import time
+
+from ._decoding import _decode_array, _decode_object, _decode_put, _decode_size, _VALUE_DECODERS
+from ._encoding import _encode_str
+
+
+# head -> name of its category in Stats
+_HEAD_CATEGORIES = [f'0x{head >> 4:X}?' if head < 0xF0 else f'F{head & 0x0F:X}'
+                    for head in range(256)]
+
+
+def _decode_array_counted(decoder, head, pos):
+    """Like _decode_array, but decodes all elements by decoder.decoders."""
+
+    buf = decoder.buf
+    decoders = decoder.decoders
+    values = []
+    head = buf[pos]
+    while head != 0xF5:
+        value, pos = decoders[head](decoder, head, pos + 1)
+        values.append(value)
+        head = buf[pos]
+    return values, pos + 1
+
+
+class Stats: # pylint: disable=too-many-instance-attributes # counters and their state
+    """Counters of decode(stats=...) and encode(stats=...), accumulated
+       over all calls they are passed to.
+
+       counts, bytes and seconds map categories of heads, e.g. "0xA?" for
+       strings or "F8" for 64-bit floats, to the number of values, bytes
+       taken by them and time spent on them. Bytes and time of objects and
+       arrays ("F3" and "F4") exclude their elements, so they are the cost
+       of the structure and its keys. table_keys and string_keys count keys
+       encoded as references to the table and as strings, max_depth is the
+       deepest nesting of objects and arrays met.
+
+       Values are counted by wrapping the functions of every head or type,
+       so passing no stats costs nothing, while counting makes decoding and
+       encoding several times slower. Keys are not counted in objects
+       decoded by object_factory or columns, nor elements of typed_arrays.
+    """
+
+    def __init__(self):
+        self._reset()
+
+    @property
+    def table_hit_rate(self):
+        """Share of keys encoded as references to the table."""
+
+        total = self.table_keys + self.string_keys
+        return self.table_keys / total if total else 0.0
+
+    def clear(self):
+        """Resets all counters."""
+
+        self._reset()
+
+    def report(self):
+        """Returns the counters as a text table."""
+
+        lines = [f"{'head':6} {'count':>10} {'bytes':>12} {'seconds':>10}"]
+        for category in sorted(self.counts):
+            lines.append(f'{category:6} {self.counts[category]:10} '
+                         f'{self.bytes[category]:12} {self.seconds[category]:10.6f}')
+        lines.append(f'keys from table: {self.table_keys} of '
+                     f'{self.table_keys + self.string_keys} ({self.table_hit_rate:.1%}), '
+                     f'max depth: {self.max_depth}')
+        return '\n'.join(lines)
+
+    def _reset(self):
+        """Sets all counters to zero."""
+
+        self.counts = collections.Counter()
+        self.bytes = collections.Counter()
+        self.seconds = collections.Counter()
+        self.table_keys = 0
+        self.string_keys = 0
+        self.max_depth = 0
+        self._depth = 0
+        self._nested = [0, 0.0] # bytes and seconds of elements of the current value
+        self._written = 0 # bytes flushed by the encoder
+
+    def _start(self):
+        """Prepares for counting a new document."""
+
+        self._depth = 0
+        self._nested = [0, 0.0]
+        self._written = 0
+
+    def _count(self, category, size, elapsed, nested):
+        """Adds the value to the counters, nested are its own counters."""
+
+        self.counts[category] += 1
+        self.bytes[category] += size - nested[0]
+        self.seconds[category] += elapsed - nested[1]
+        self._nested[0] += size
+        self._nested[1] += elapsed
+
+    def _enter(self, structure):
+        """Starts counting a value, returns counters of the outer one."""
+
+        outer = self._nested
+        self._nested = [0, 0.0]
+        if structure:
+            self._depth += 1
+            self.max_depth = max(self.max_depth, self._depth)
+        return outer
+
+    def _leave(self, structure, outer):
+        nested = self._nested
+        self._nested = outer
+        if structure:
+            self._depth -= 1
+        return nested
+
+    def _decoders(self, decoders):
+        """Returns copy of the table of decoders counting values."""
+
+        decoders = list(decoders or _VALUE_DECODERS)
+        if decoders[0xF3] is _decode_object:
+            decoders[0xF3] = self._decode_object
+        if decoders[0xF4] is _decode_array:
+            decoders[0xF4] = _decode_array_counted
+        clock = time.perf_counter
+
+        def wrap(value_decoder, category, structure):
+            def decode_counted(decoder, head, pos):
+                outer = self._enter(structure)
+                start = clock()
+                value, end = value_decoder(decoder, head, pos)
+                elapsed = clock() - start
+                nested = self._leave(structure, outer)
+                self._count(category, end - pos + 1, elapsed, nested)
+                return value, end
+            return decode_counted
+
+        decoders = [wrap(value_decoder, _HEAD_CATEGORIES[head], head in (0xF3, 0xF4))
+                    for head, value_decoder in enumerate(decoders)]
+        decoders[0xB0:0xC0] = [self._decode_put_and_value] * 16
+        return decoders
+
+    def _decode_put_and_value(self, decoder, head, pos):
+        """Like _decode_put_and_value, but counts every put."""
+
+        buf = decoder.buf
+        while head & 0xF0 == 0xB0:
+            start = pos - 1
+            pos = _decode_put(decoder, head, pos)
+            self._count('0xB?', pos - start, 0.0, (0, 0.0))
+            head = buf[pos]
+            pos += 1
+        return decoder.decoders[head](decoder, head, pos)
+
+    def _decode_object(self, decoder, head, pos):
+        """Like _decode_object, but counts keys and decodes all values by
+           decoder.decoders.
+        """
+
+        buf = decoder.buf
+        table = decoder.table
+        decoders = decoder.decoders
+        obj = {}
+        while True:
+            head = buf[pos]
+            pos += 1
+            if head < 0x80:
+                key = table[head]
+                self.table_keys += 1
+            elif head == 0xF5:
+                return obj, pos
+            elif head & 0xF0 == 0xA0:
+                size = head & 0x0F
+                if size > 9:
+                    size, pos = _decode_size(decoder, head, pos)
+                end = pos + size
+                key = sys.intern(decoder.utf8_decode(buf[pos:end], None, True)[0])
+                pos = end + 1 # skip null character
+                self.string_keys += 1
+            elif head & 0xF0 == 0xB0:
+                start = pos - 1
+                pos = _decode_put(decoder, head, pos)
+                self._count('0xB?', pos - start, 0.0, (0, 0.0))
+                continue
+            else:
+                raise ValueError('key must be string')
+            head = buf[pos]
+            obj[key], pos = decoders[head](decoder, head, pos + 1)
+
+    def _encoder(self, encoder):
+        """Makes the encoder count values: wraps its functions encoding
+           types, keys and writes.
+        """
+
+        clock = time.perf_counter
+        out = encoder.out
+        encode_key = encoder.encode_key
+        keys = encoder.keys
+
+        def wrap(value_encoder, fallback, structure):
+            def encode_counted(encoder, value):
+                start = self._written + len(out)
+                outer = self._enter(structure)
+                begin = clock()
+                value_encoder(encoder, value)
+                elapsed = clock() - begin
+                nested = self._leave(structure, outer)
+                end = self._written + len(out)
+                # the head is gone from the buffer if it was flushed
+                head = out[start - self._written] if start >= self._written else None
+                category = fallback if head is None else _HEAD_CATEGORIES[head]
+                self._count(category, end - start, elapsed, nested)
+            return encode_counted
+
+        def encode_key_counted(out, key):
+            start = len(out)
+            if encode_key is not None:
+                encode_key(out, key)
+            else:
+                index = keys.get(key)
+                if index is None:
+                    _encode_str(out, 0xA0, key)
+                else:
+                    out.append(index)
+            head = out[start]
+            if head & 0xF0 == 0xA0:
+                self.string_keys += 1
+                return
+            self.table_keys += 1
+            if head & 0xF0 == 0xB0:
+                self._count('0xB?', len(out) - start - 1, 0.0, (0, 0.0))
+
+        if encoder.write is not None:
+            write = encoder.write
+
+            def write_counted(data):
+                self._written += len(data)
+                write(data)
+
+            encoder.write = write_counted
+        encoder.encode_key = encode_key_counted
+        encoder.encoders = {cls: wrap(value_encoder, 'F3' if cls is dict else 'F4',
+                                      cls in (dict, list, tuple))
+                            for cls, value_encoder in encoder.encoders.items()}
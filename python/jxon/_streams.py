@@ -0,0 +1,560 @@
+"""Incremental decoding: Parser, load() and events of iterparse() and
+   iterparse_json().
+"""
+
+#
+#   Originally published to https://github.com/visualdoj/jxon
+#
+#   Author:  Doj
+#   License: Public domain or MIT
+#
+
+import json
+import math
+import struct
+import itertools
+import re
+
+from ._decoding import (
+    _as_buffer, _bigint_end, _decode_bigint, _decode_put, _decode_string, _Decoder, _guess_jxon,
+    _INT_STRUCTS, _VALUE_DECODERS,
+)
+
+
+# size of chunks read from files
+_READ_SIZE = 64 * 1024
+
+# objects and arrays larger than that are not decoded at once by Parser
+# if they did not fit its input once
+_SMALL_CONTAINER_SIZE = 4 * 1024
+
+
+def _token_end(buf, head, pos, end):
+    """Returns offset right after the scalar or the put starting with head.
+
+       pos is the offset right after the head. Returns None if the buffer
+       ends before the size of the value is known. Raises ValueError for
+       negative sizes like the decoding functions, other malformed values
+       are left to them.
+    """
+
+    high = head & 0xF0
+    if high == 0xF0:
+        if head == 0xF7:
+            return pos + 4
+        if head == 0xF8:
+            return pos + 8
+        if head == 0xF9:
+            pos = _bigint_end(buf, pos, end)
+            return None if pos is None else _bigint_end(buf, pos, end)
+        return pos
+    if not 0x80 <= high <= 0xB0:
+        return pos
+    size = head & 0x0F
+    if size == 15 and high != 0x80:
+        raise ValueError('size must not be negative')
+    if 10 <= size <= 13:
+        int_struct = _INT_STRUCTS[size - 10]
+        if pos + int_struct.size > end:
+            return None
+        size = int_struct.unpack_from(buf, pos)[0]
+        pos += int_struct.size
+    elif size == 14:
+        if high == 0x80:
+            return _bigint_end(buf, pos, end)
+        if _bigint_end(buf, pos, end) is None:
+            return None
+        size, pos = _decode_bigint(_Decoder(buf), pos)
+    if high == 0x80:
+        return pos
+    if size < 0:
+        raise ValueError('size must not be negative')
+    if high == 0x90:
+        return pos + size
+    if high == 0xA0:
+        return pos + size + 1 # null character
+    return pos + size + 2 # null character and index
+
+
+def _decode_if_complete(decoder, head, pos, end):
+    """Decodes the object or array starting with head if it ends before end.
+
+       Returns the value and the offset right after it, or None if it does
+       not fit. The keys table is restored then, the container is parsed
+       again from its start later.
+    """
+
+    table = decoder.table
+    saved_table = table[:]
+    try:
+        value, token_end = decoder.decoders[head](decoder, head, pos)
+        if token_end <= end:
+            return value, token_end
+    except (IndexError, ValueError, struct.error):
+        pass
+    table[:] = saved_table
+    return None
+
+
+class Parser:
+    """Incremental JXON decoder.
+
+       Takes input in chunks of arbitrary sizes, e.g. as they come from a
+       socket, and returns top-level values as soon as they are complete.
+       Input may contain any number of top-level values one after another.
+
+       Such a stream of values has one keys table: it is empty at the start
+       of the stream and table puts made in one value stay visible in the
+       following ones. iterparse(), build_index(), iter_file(),
+       decode_file_parallel() and aiter_values() read streams the same way.
+       Values encoded separately, e.g. by dump() calls on the same file, do
+       not refer to puts of each other, so they decode the same in any part
+       of a stream.
+
+       Bytes of an unfinished scalar are kept until enough input arrives,
+       they are not parsed again with every chunk.
+
+       Scalars are decoded once they are complete. Objects and arrays are
+       decoded at once if they fit the available input, otherwise they are
+       kept open in the stack and filled as the input arrives. Once a large
+       one does not fit, the following ones at the same depth are not tried
+       at once anymore.
+    """
+
+    def __init__(self):
+        self._decoder = _Decoder(b'')
+        self._stack = []     # open objects and arrays
+        self._key = None     # key for the next value in the innermost object
+        self._chunks = []    # input that is not parsed yet
+        self._size = 0       # total size of _chunks
+        self._needed = 1     # nothing can be parsed until _size reaches it
+        self._large = set()  # depths where objects and arrays are parsed
+                             # incrementally, they did not fit the input
+
+    def feed(self, data):
+        """Parses the next chunk of input.
+
+           Returns list of top-level values completed by the chunk.
+        """
+
+        if not data:
+            return []
+        self._chunks.append(bytes(data))
+        self._size += len(data)
+        if self._size < self._needed:
+            return []
+        buf = b''.join(self._chunks)
+        values, pos = self._parse(buf)
+        rest = buf[pos:]
+        self._chunks = [rest] if rest else []
+        self._size = len(rest)
+        return values
+
+    def close(self):
+        """Checks that the input did not end in the middle of a value."""
+
+        if self._stack or self._size:
+            raise ValueError('Unexpected end of stream')
+
+    def _open(self, container, key):
+        """Adds the empty object or array to the innermost open one under
+           the key, or to its end if the key is None, and opens it.
+        """
+
+        stack = self._stack
+        if stack:
+            if key is None:
+                stack[-1].append(container)
+            else:
+                stack[-1][key] = container
+        stack.append(container)
+
+    def _parse(self, buf):
+        """Parses buf, returns completed values and offset of unparsed rest."""
+
+        decoder = self._decoder
+        decoder.buf = buf
+        decoders = _VALUE_DECODERS
+        table = decoder.table
+        stack = self._stack
+        large = self._large
+        key = self._key
+        values = []
+        pos = 0
+        end = len(buf)
+        self._needed = 1
+        while pos < end:
+            head = buf[pos]
+            if stack and key is None and stack[-1].__class__ is dict:
+                if head < 0x80:
+                    key = table[head]
+                    pos += 1
+                    continue
+                if head != 0xF5:
+                    if head & 0xE0 != 0xA0:
+                        raise ValueError('key must be string')
+                    token_end = _token_end(buf, head, pos + 1, end)
+                    if token_end is None or token_end > end:
+                        self._needed = (token_end or end + 1) - pos
+                        break
+                    if head < 0xB0:
+                        key, pos = _decode_string(decoder, head, pos + 1)
+                    else:
+                        pos = _decode_put(decoder, head, pos + 1)
+                    continue
+
+            if head == 0xF5:
+                if not stack or key is not None:
+                    raise ValueError('unexpected end of a structure')
+                value = stack.pop()
+                pos += 1
+                if not stack:
+                    values.append(value)
+                continue
+
+            if head in (0xF3, 0xF4):
+                decoded = (None if len(stack) in large else
+                           _decode_if_complete(decoder, head, pos + 1, end))
+                if decoded is None:
+                    # does not fit, keep it open
+                    if end - pos > _SMALL_CONTAINER_SIZE:
+                        large.add(len(stack))
+                    self._open({} if head == 0xF3 else [], key)
+                    key = None
+                    pos += 1
+                    continue
+                value, token_end = decoded
+            else:
+                token_end = _token_end(buf, head, pos + 1, end)
+                if token_end is None or token_end > end:
+                    self._needed = (token_end or end + 1) - pos
+                    break
+                if head & 0xF0 == 0xB0:
+                    pos = _decode_put(decoder, head, pos + 1)
+                    continue
+                value, token_end = decoders[head](decoder, head, pos + 1)
+
+            pos = token_end
+            if not stack:
+                values.append(value)
+            elif key is None:
+                stack[-1].append(value)
+            else:
+                stack[-1][key] = value
+                key = None
+
+        self._key = key
+        decoder.buf = b''
+        return values, pos
+
+
+def _read_chunks(fp):
+    """Yields content of binary file fp read through a buffer of fixed size.
+
+       Yielded memoryviews are valid until the next one is requested.
+    """
+
+    buffer = bytearray(_READ_SIZE)
+    view = memoryview(buffer)
+    while True:
+        size = fp.readinto(buffer)
+        if not size:
+            return
+        yield view[:size]
+
+
+def load(fp, allow_JSON=True):
+    """Reads JXON value from binary file fp and returns it as a python value.
+
+       The file is read through a buffer of fixed size, so the encoded value
+       is never kept in memory as a whole. Data following the value may be
+       consumed.
+    """
+
+    parser = Parser()
+    first = True
+    for chunk in _read_chunks(fp):
+        if first and allow_JSON and not _guess_jxon(chunk):
+            try:
+                return json.loads(bytes(chunk) + fp.read())
+            except Exception as exception:
+                raise ValueError('data must be in JXON or JSON format') from exception
+        first = False
+        values = parser.feed(chunk)
+        if values:
+            return values[0]
+    raise ValueError('Unexpected end of stream')
+
+
+def iterparse(source):
+    """Parses JXON and yields events without building python values.
+
+       source is either a buffer (bytes, memoryview, mmap, ...) or a binary
+       file object, the file is read in chunks of fixed size.
+
+       Yields tuples (event, value, offset), where offset is position of the
+       head byte of the command in the source and event is one of:
+
+           'start_object'  value is None
+           'start_array'   value is None
+           'end'           end of object or array, value is None
+           'key'           value is the key, either from the string or from
+                           the table
+           'scalar'        value is None, bool, int, float, str or bytes
+           'table_put'     value is (index, string)
+
+       Sequence of top-level values in the source is allowed.
+    """
+
+    return _iterparse(source, True)
+
+
+def _iterparse(source, decode_scalars):
+    """Implements iterparse(), values of scalars are None unless
+       decode_scalars is True.
+    """
+
+    is_file = hasattr(source, 'readinto')
+    chunks = _read_chunks(source) if is_file else (source,)
+    decoder = _Decoder(b'')
+    table = decoder.table
+    stack = []          # True for open objects, False for open arrays
+    expect_key = False
+    pending = []        # unparsed input
+    pending_size = 0
+    needed = 1          # nothing can be parsed until pending_size reaches it
+    base = 0            # offset of the buffer in the source
+    for chunk in chunks:
+        pending.append(chunk)
+        pending_size += len(chunk)
+        if pending_size < needed:
+            pending[-1] = bytes(chunk)
+            continue
+        buf = b''.join(pending) if len(pending) > 1 or is_file else _as_buffer(chunk)
+        decoder.buf = buf
+        pos = 0
+        end = len(buf)
+        needed = 1
+        while pos < end:
+            head = buf[pos]
+            offset = base + pos
+            if expect_key:
+                if head < 0x80:
+                    pos += 1
+                    expect_key = False
+                    yield 'key', table[head], offset
+                    continue
+                if head != 0xF5:
+                    if head & 0xE0 != 0xA0:
+                        raise ValueError('key must be string')
+                    token_end = _token_end(buf, head, pos + 1, end)
+                    if token_end is None or token_end > end:
+                        needed = (token_end or end + 1) - pos
+                        break
+                    if head < 0xB0:
+                        value, pos = _decode_string(decoder, head, pos + 1)
+                        expect_key = False
+                        yield 'key', value, offset
+                    else:
+                        pos = _decode_put(decoder, head, pos + 1)
+                        yield 'table_put', (buf[pos - 1], table[buf[pos - 1]]), offset
+                    continue
+
+            if head == 0xF3:
+                pos += 1
+                stack.append(True)
+                expect_key = True
+                yield 'start_object', None, offset
+                continue
+            if head == 0xF4:
+                pos += 1
+                stack.append(False)
+                yield 'start_array', None, offset
+                continue
+            if head == 0xF5:
+                if not stack or (stack[-1] and not expect_key):
+                    raise ValueError('unexpected end of a structure')
+                pos += 1
+                stack.pop()
+                expect_key = bool(stack) and stack[-1]
+                yield 'end', None, offset
+                continue
+
+            token_end = _token_end(buf, head, pos + 1, end)
+            if token_end is None or token_end > end:
+                needed = (token_end or end + 1) - pos
+                break
+            if head & 0xF0 == 0xB0:
+                pos = _decode_put(decoder, head, pos + 1)
+                yield 'table_put', (buf[pos - 1], table[buf[pos - 1]]), offset
+                continue
+            if decode_scalars or head & 0x0F == 14 or not 0x80 <= head <= 0xF8:
+                value, pos = _VALUE_DECODERS[head](decoder, head, pos + 1)
+            else:
+                value, pos = None, token_end
+            expect_key = bool(stack) and stack[-1]
+            yield 'scalar', value, offset
+
+        base += pos
+        pending = [buf[pos:]] if pos < end else []
+        pending_size = end - pos
+
+    if pending or stack:
+        raise ValueError('Unexpected end of stream')
+
+
+# JSON token after whitespace and optional comma: key (string followed by
+# colon), string, number or literal, or bracket, see iterparse_json()
+_JSON_TOKEN = re.compile(rb'[ \t\n\r]*(,[ \t\n\r]*)?(?:'
+                         rb'("[^"\\]*(?:\\.[^"\\]*)*")([ \t\n\r]*:)?|'
+                         rb'([-+.0-9A-Za-z]+)|'
+                         rb'([][{}]))', re.DOTALL)
+_JSON_SEPARATOR = re.compile(rb'[ \t\n\r]*(,[ \t\n\r]*)?')
+_JSON_WHITESPACE = re.compile(rb'[ \t\n\r]*')
+_JSON_NUMBER = re.compile(rb'-?(?:0|[1-9][0-9]*)(\.[0-9]+)?([eE][-+]?[0-9]+)?')
+_JSON_LITERALS = {
+    b'null': None,
+    b'false': False,
+    b'true': True,
+    b'NaN': math.nan,
+    b'Infinity': math.inf,
+    b'-Infinity': -math.inf,
+}
+
+# what may follow in JSON, see iterparse_json()
+_JSON_VALUE = 0         # value
+_JSON_VALUE_OR_END = 1  # value or "]" after "["
+_JSON_KEY = 2           # key after ","
+_JSON_KEY_OR_END = 3    # key or "}" after "{"
+_JSON_NEXT = 4          # "," or end of the structure after value
+
+
+def _json_tokens(source):
+    """Splits JSON into tokens for iterparse_json().
+
+       Yields (kind, token, offset, comma), where kind is the group of
+       _JSON_TOKEN matched: 2 for string, 3 for key with colon, 4 for number
+       or literal and 5 for bracket. token is bytes of the string with
+       quotes, the number, the literal or the bracket. comma is offset of
+       the comma before the token, -1 if there is none.
+    """
+
+    is_file = hasattr(source, 'readinto')
+    chunks = _read_chunks(source) if is_file else (_as_buffer(source),)
+    match_token = _JSON_TOKEN.match
+    pending = []        # unparsed input
+    pending_size = 0
+    needed = 1          # nothing can be parsed until pending_size reaches it
+    base = 0            # offset of the buffer in the source
+    for chunk in itertools.chain(chunks, (None,)):
+        at_end = chunk is None
+        if not at_end:
+            pending.append(bytes(chunk) if is_file else chunk)
+            pending_size += len(chunk)
+            if pending_size < needed:
+                continue
+        buf = pending[0] if len(pending) == 1 and not is_file else b''.join(pending)
+        pos = 0
+        end = len(buf)
+        needed = 1
+        while True:
+            match = match_token(buf, pos)
+            if match is None:
+                token_pos = _JSON_SEPARATOR.match(buf, pos).end()
+                if token_pos < end and buf[token_pos] != 0x22: # "
+                    raise ValueError('unexpected character at ' + str(base + token_pos))
+                if not at_end: # string or separator continues in the next chunk
+                    needed = 2 * (end - pos)
+                elif token_pos < end or buf[pos:end].strip():
+                    raise ValueError('Unexpected end of stream')
+                else:
+                    pos = end
+                break
+            kind = match.lastindex
+            if not at_end and kind != 5 and (
+                    match.end() == end or
+                    # colon after key may be in the next chunk
+                    kind == 2 and _JSON_WHITESPACE.match(buf, match.end()).end() == end):
+                needed = 2 * (end - pos)
+                break
+            pos = match.end()
+            comma = match.start(1)
+            group = kind if kind != 3 else 2
+            yield (kind, match.group(group), base + match.start(group),
+                   comma if comma < 0 else base + comma)
+
+        base += pos
+        pending = [buf[pos:]] if pos < end else []
+        pending_size = end - pos
+
+
+def _json_number(token, offset):
+    """Returns value of JSON number token."""
+
+    number = _JSON_NUMBER.fullmatch(token)
+    if number is None:
+        raise ValueError('unexpected token at ' + str(offset))
+    return int(token) if number.lastindex is None else float(token)
+
+
+def iterparse_json(source):
+    """Parses JSON and yields the same events as iterparse() does for JXON,
+       without building python values, offsets are in bytes.
+
+       source is either a buffer with UTF-8 encoded JSON or a binary file
+       object, the file is read in chunks of fixed size. Sequence of
+       top-level values separated by whitespace is allowed.
+    """
+
+    scanstring = json.decoder.scanstring
+    literals = _JSON_LITERALS
+    stack = []          # True for open objects, False for open arrays
+    state = _JSON_VALUE
+    for kind, token, offset, comma in _json_tokens(source):
+        if comma >= 0:
+            if state != _JSON_NEXT or not stack:
+                raise ValueError('unexpected "," at ' + str(comma))
+            state = _JSON_KEY if stack[-1] else _JSON_VALUE
+        elif state == _JSON_NEXT:
+            if kind == 5 and token in b'}]' and stack:
+                state = _JSON_KEY_OR_END if stack[-1] else _JSON_VALUE_OR_END
+            elif not stack:
+                state = _JSON_VALUE # next top-level value
+            else:
+                raise ValueError('expected "," or end of a structure at ' + str(offset))
+
+        if kind == 3:
+            if state < _JSON_KEY:
+                raise ValueError('unexpected ":" at ' + str(offset))
+            state = _JSON_VALUE
+            key = token.decode('utf-8')
+            yield 'key', scanstring(key, 1)[0] if 0x5C in token else key[1:-1], offset # \
+        elif kind == 5:
+            if token in b'}]':
+                if state != (_JSON_KEY_OR_END if token == b'}' else _JSON_VALUE_OR_END):
+                    raise ValueError(f'unexpected "{token.decode()}" at {offset}')
+                stack.pop()
+                state = _JSON_NEXT
+                yield 'end', None, offset
+            elif state >= _JSON_KEY:
+                raise ValueError('key must be string at ' + str(offset))
+            else:
+                is_object = token == b'{'
+                stack.append(is_object)
+                state = _JSON_KEY_OR_END if is_object else _JSON_VALUE_OR_END
+                yield 'start_object' if is_object else 'start_array', None, offset
+        elif state >= _JSON_KEY:
+            if kind == 2:
+                raise ValueError('expected ":" at ' + str(offset + len(token)))
+            raise ValueError('key must be string at ' + str(offset))
+        else:
+            state = _JSON_NEXT
+            if kind == 2:
+                value = token.decode('utf-8')
+                value = scanstring(value, 1)[0] if 0x5C in token else value[1:-1] # \
+            else:
+                value = literals[token] if token in literals else _json_number(token, offset)
+            yield 'scalar', value, offset
+
+    if stack or state not in (_JSON_VALUE, _JSON_NEXT):
+        raise ValueError('Unexpected end of stream')
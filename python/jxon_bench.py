@@ -0,0 +1,401 @@
+#!/usr/bin/env python
+
+"""Benchmarks for jxon module.
+
+   Usage: python jxon_bench.py [name...]
+
+   Without arguments runs all benchmarks.
+"""
+
+import array
+import dataclasses
+import fractions
+import io
+import json
+import math
+import os
+import struct
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+import jxon
+
+EXAMPLES_PREFIX = '../examples'
+
+
+def read_example(name):
+    """Returns content of the specified file from examples directory."""
+
+    with open(os.path.join(EXAMPLES_PREFIX, name), 'rb') as f:
+        return f.read()
+
+
+def measure(name, function, number=None):
+    """Runs function several times and prints the best time of one call."""
+
+    timer = timeit.Timer(function)
+    if number is None:
+        number = timer.autorange()[0]
+    best = min(timer.repeat(repeat=5, number=number)) / number
+    if best < 0.001:
+        print(f'{name:<40} {best * 1000000:10.3f} us')
+    else:
+        print(f'{name:<40} {best * 1000:10.3f} ms')
+    return best
+
+
+def decode_bytesio(data):
+    """Decodes JXON reading it from io.BytesIO byte by byte.
+
+       This is how jxon.decode() used to work, the benchmarks compare against
+       it.
+    """
+
+    table={}
+    stream = io.BytesIO(data)
+
+    def decode_bigint():
+        raise NotImplementedError('BigInt Decoder')
+
+    def decode_int(head):
+        low = head & 0x0F
+        if low == 10:
+            return struct.unpack('<b', stream.read(1))[0]
+        if low == 11:
+            return struct.unpack('<h', stream.read(2))[0]
+        if low == 12:
+            return struct.unpack('<i', stream.read(4))[0]
+        if low == 13:
+            return struct.unpack('<q', stream.read(8))[0]
+        if low == 14:
+            return decode_bigint()
+        return low if low != 15 else -1
+
+    def decode_key_from_stream(head):
+        if (head & 0xF0) != 0xA0:
+            raise ValueError('key must be string')
+        i = decode_int(head)
+        s = stream.read(i).decode('utf-8')
+        stream.read(1) # skip null character
+        return s
+
+    def decode_object_from_stream():
+        obj = {}
+        while True:
+            head = stream.read(1)[0]
+            if head == 0xF5:
+                return obj
+            if head < 0x80:
+                key = table[head]
+            else:
+                key = decode_key_from_stream(head)
+            head = stream.read(1)[0]
+            value = decode_value_from_stream(head)
+            obj[key] = value
+
+    def decode_array_from_stream():
+        array = []
+        while True:
+            head = stream.read(1)
+            if head == b'':
+                raise ValueError('Unexpected end of stream')
+            head = head[0]
+            if head == 0xF5:
+                return array
+            value = decode_value_from_stream(head)
+            array.append(value)
+
+    def decode_value_from_stream(head):
+        while True:
+            if head == 0xF0:
+                return None
+            if head == 0xF1:
+                return False
+            if head == 0xF2:
+                return True
+            if head == 0xF3:
+                return decode_object_from_stream()
+            if head == 0xF4:
+                return decode_array_from_stream()
+            if head == 0xF5:
+                return ValueError('unexpected end of a structure')
+            if head == 0xF6:
+                return 0.0
+            if head == 0xF7:
+                return struct.unpack('<f', stream.read(4))[0]
+            if head == 0xF8:
+                return struct.unpack('<d', stream.read(8))[0]
+            if head == 0xF9:
+                return fractions.Fraction(decode_bigint(), decode_bigint())
+            if 0x80 <= head <= 0xBF:
+                i = decode_int(head)
+                if head & 0xF0 == 0x80:
+                    return i
+                if head & 0xF0 == 0x90:
+                    return stream.read(i)
+                if head & 0xF0 == 0xA0:
+                    s = stream.read(i).decode('utf-8')
+                    stream.read(1) # skip null character
+                    return s
+                if head & 0xF0 == 0xB0:
+                    s = stream.read(i).decode('utf-8')
+                    stream.read(1) # skip null character
+                    index = struct.unpack('<B', stream.read(1))[0]
+                    table[index] = s
+                    head = stream.read(1)[0]
+                    continue
+            raise ValueError('Unknown head in JXON ' + hex(head))
+
+    return decode_value_from_stream(stream.read(1)[0])
+
+
+def bench_decode():
+    """Compares jxon.decode() with the BytesIO decoder."""
+
+    for name in ('movies.jxon', 'movies_compressed.jxon'):
+        data = read_example(name)
+        assert jxon.decode(data) == decode_bytesio(data)
+        old = measure(f'decode_bytesio {name}', lambda: decode_bytesio(data))
+        new = measure(f'jxon.decode {name}', lambda: jxon.decode(data))
+        print(f'{"speedup":<40} {old / new:10.2f} x')
+
+
+def bench_lazy():
+    """Compares point lookups with decode_lazy() and decode()."""
+
+    data = read_example('movies.jxon')
+    measure('decode movies[500].year',
+            lambda: jxon.decode(data)['movies'][500]['year'])
+    measure('decode_lazy movies[500].year',
+            lambda: jxon.decode_lazy(data)['movies'][500]['year'])
+
+
+def bench_fields():
+    """Compares decoding 2 of 30 fields of records with full decoding."""
+
+    keys = [f'field{i}' for i in range(30)]
+    records = [{key: f'value {i} {key} ' * 3 if i % 2 else i for key in keys}
+               for i in range(5000)]
+    data = jxon.encode({'records': records}, keys_table=keys)
+    measure('decode records', lambda: jxon.decode(data))
+    fields = [['records', '*', 'field1'], ['records', '*', 'field3']]
+    measure('decode records, 2 fields', lambda: jxon.decode(data, fields=fields))
+
+
+def bench_encode():
+    """Measures jxon.encode() on the movies dataset."""
+
+    value = jxon.decode(read_example('movies.json'))
+    keys = ['id', 'title', 'year', 'director', 'genres']
+    measure('jxon.encode movies', lambda: jxon.encode(value))
+    measure('jxon.encode movies_compressed',
+            lambda: jxon.encode(value, keys_table=keys))
+    measure('jxon.encode movies, auto_keys',
+            lambda: jxon.encode(value, auto_keys=True))
+    measure('jxon.encode 1M integers', lambda: jxon.encode(list(range(1_000_000))))
+
+
+def bench_session():
+    """Compares small messages encoded with a Session and without."""
+
+    messages = [{'jsonrpc': '2.0', 'method': 'get_movie', 'id': i,
+                 'params': {'movie_id': i, 'fields': ['title', 'year']}}
+                for i in range(1000)]
+    blobs = [jxon.encode(message) for message in messages]
+    sender = jxon.Session()
+    session_blobs = [sender.encode(message) for message in messages]
+    print(f'{"bytes per message":<40} {len(blobs[-1]):10d}')
+    print(f'{"bytes per message, session":<40} {len(session_blobs[-1]):10d}')
+    measure('decode 1000 messages',
+            lambda: [jxon.decode(blob) for blob in blobs])
+
+    def decode_session():
+        receiver = jxon.Session()
+        return [receiver.decode(blob) for blob in session_blobs]
+    measure('decode 1000 messages, session', decode_session)
+
+
+def bench_records():
+    """Compares iter_file() with decode_file_parallel() on all cores, with
+       and without offsets of records.
+    """
+
+    movies = jxon.decode(read_example('movies.json'))['movies']
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'records.jxon')
+        offsets = []
+        with open(path, 'wb') as f:
+            for _ in range(2000):
+                for movie in movies[:10]:
+                    offsets.append(f.tell())
+                    jxon.dump(movie, f, auto_keys=True)
+        measure('iter_file 20000 records',
+                lambda: list(jxon.iter_file(path)), number=1)
+        measure(f'decode_file_parallel, {os.cpu_count()} workers',
+                lambda: jxon.decode_file_parallel(path), number=1)
+        measure(f'decode_file_parallel, {os.cpu_count()} workers, offsets',
+                lambda: jxon.decode_file_parallel(path, offsets=offsets), number=1)
+
+
+def bench_typed_arrays():
+    """Compares 1M floats encoded from array.array and from list."""
+
+    values = array.array('d', [0.5 * i for i in range(1_000_000)])
+    floats = values.tolist()
+    data = jxon.encode(values)
+    measure('encode 1M floats, list', lambda: jxon.encode(floats), number=1)
+    measure('encode 1M floats, array.array', lambda: jxon.encode(values), number=1)
+    measure('decode 1M floats, list', lambda: jxon.decode(data), number=1)
+    measure('decode 1M floats, array.array',
+            lambda: jxon.decode(data, typed_arrays='array'), number=1)
+
+
+def bench_columns():
+    """Compares decode_columns() with decode() followed by transposing."""
+
+    keys = [f'field{i}' for i in range(10)]
+    records = [{key: i * j for j, key in enumerate(keys)} for i in range(20000)]
+    data = jxon.encode({'records': records}, keys_table=keys)
+
+    def transpose():
+        decoded = jxon.decode(data)['records']
+        return {key: [record[key] for record in decoded] for key in keys}
+    measure('decode and transpose', transpose)
+    measure('decode_columns', lambda: jxon.decode_columns(data, 'records'))
+
+    compressed = read_example('movies_compressed.jxon')
+    columnar = jxon.encode(jxon.decode(compressed), columns=True, auto_keys=True)
+    print(f'{"size movies_compressed.pb":<40} {len(read_example("movies_compressed.pb")):10d}')
+    print(f'{"size movies_compressed.jxon":<40} {len(compressed):10d}')
+    print(f'{"size movies, columns":<40} {len(columnar):10d}')
+    measure('decode movies_compressed.jxon', lambda: jxon.decode(compressed))
+    measure('decode movies, columns',
+            lambda: jxon.decode(columnar, columns=True))
+    measure('decode_columns movies_compressed.jxon',
+            lambda: jxon.decode_columns(compressed, 'movies'))
+    measure('decode_columns movies, columns',
+            lambda: jxon.decode_columns(columnar, 'movies'))
+
+
+@dataclasses.dataclass
+class Movie:
+    """Record for bench_encoder."""
+
+    id: str
+    title: str
+    year: int
+    director: str
+    genres: list
+
+
+def bench_encoder():
+    """Compares jxon.Encoder on dataclasses with converting them to dicts."""
+
+    movies = [Movie(**movie) for movie
+              in jxon.decode(read_example('movies.json'))['movies']]
+    keys = ['id', 'title', 'year', 'director', 'genres']
+    encoder = jxon.Encoder(keys_table=keys)
+    measure('jxon.encode dataclasses.asdict',
+            lambda: jxon.encode([dataclasses.asdict(movie) for movie in movies],
+                                keys_table=keys))
+    measure('jxon.Encoder.encode dataclasses', lambda: encoder.encode(movies))
+
+
+def bench_object_factory():
+    """Compares time and memory of decoding objects as dicts and records."""
+
+    data = read_example('movies_compressed.jxon')
+    for factory in (None, 'namedtuple', 'slots', 'tuple'):
+        tracemalloc.start()
+        value = jxon.decode(data, object_factory=factory)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del value
+        print(f'{f"memory, object_factory={factory}":<40} {size:10d}')
+        measure(f'decode, object_factory={factory}',
+                lambda: jxon.decode(data, object_factory=factory)) # pylint: disable=cell-var-from-loop
+
+
+def bench_string_cache():
+    """Compares decoding strings repeated in data with and without cache."""
+
+    data = jxon.encode([{'genre': ['comedy', 'drama', 'science fiction'][i % 3],
+                         'director': f'Director {i % 50}'} for i in range(20000)])
+    cache = jxon.StringCache()
+    for string_cache in (None, cache):
+        tracemalloc.start()
+        value = jxon.decode(data, string_cache=string_cache)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del value
+        name = 'StringCache' if string_cache else 'no cache'
+        print(f'{f"memory, {name}":<40} {size:10d}')
+        measure(f'decode, {name}', lambda: jxon.decode(data, string_cache=string_cache)) # pylint: disable=cell-var-from-loop
+    print(f'{"hits/misses":<40} {cache.hits:>10}/{cache.misses}')
+
+
+def bench_small():
+    """Measures encoding and decoding of small messages, one at a time."""
+
+    message = {'jsonrpc': '2.0', 'method': 'get_movie', 'id': 17,
+               'params': {'movie_id': 17, 'fields': ['title', 'year']}}
+    data = jxon.encode(message)
+    text = json.dumps(message)
+    encoder = jxon.Encoder()
+    decoder = jxon.Decoder(allow_JSON=False)
+    measure('json.dumps small', lambda: json.dumps(message))
+    measure('jxon.encode small', lambda: jxon.encode(message))
+    measure('jxon.Encoder.encode small', lambda: encoder.encode(message))
+    measure('json.loads small', lambda: json.loads(text))
+    measure('decode_bytesio small', lambda: decode_bytesio(data))
+    measure('jxon.decode small', lambda: jxon.decode(data))
+    measure('jxon.Decoder.decode small', lambda: decoder.decode(data))
+
+
+def bench_bigint():
+    """Measures encoding and decoding of BigInt and big floats by sizes."""
+
+    for bits in (100, 1000, 10000, 100000, 1000000):
+        value = (1 << bits) // 3
+        data = jxon.encode(value)
+        measure(f'encode {bits}-bit integer', lambda: jxon.encode(value)) # pylint: disable=cell-var-from-loop
+        measure(f'decode {bits}-bit integer', lambda: jxon.decode(data)) # pylint: disable=cell-var-from-loop
+    value = fractions.Fraction(3**20000, 2**50000)
+    data = jxon.encode(value)
+    measure('encode big float', lambda: jxon.encode(value))
+    measure('decode big float', lambda: jxon.decode(data))
+
+
+def bench_floats():
+    """Measures encoding of floats by float_mode, e.g. telemetry samples."""
+
+    samples = [{'t': i * 0.001, 'x': math.sin(i), 'y': float(i % 256)}
+               for i in range(100000)]
+    for float_mode in ('shortest', 'f64', 'f32_lossy'):
+        size = len(jxon.encode(samples, float_mode=float_mode))
+        measure(f'encode floats, {float_mode}, {size} bytes',
+                lambda: jxon.encode(samples, float_mode=float_mode)) # pylint: disable=cell-var-from-loop
+
+
+BENCHMARKS = {
+    'decode': bench_decode,
+    'encode': bench_encode,
+    'lazy': bench_lazy,
+    'fields': bench_fields,
+    'session': bench_session,
+    'records': bench_records,
+    'typed_arrays': bench_typed_arrays,
+    'columns': bench_columns,
+    'encoder': bench_encoder,
+    'object_factory': bench_object_factory,
+    'string_cache': bench_string_cache,
+    'small': bench_small,
+    'bigint': bench_bigint,
+    'floats': bench_floats,
+}
+
+if __name__ == "__main__":
+    for benchmark in sys.argv[1:] or BENCHMARKS:
+        BENCHMARKS[benchmark]()
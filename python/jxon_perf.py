@@ -0,0 +1,150 @@
+"""Performance regression tests for jxon module.
+
+Not collected by the unit tests, run them with `make perf`. Every workload
+is timed and its allocations are measured, then they are compared with the
+baseline stored in a local JSON file. The first run records the baseline.
+Checks of how time grows with size of the input need no baseline.
+
+Environment variables:
+    JXON_PERF_BASELINE          path of the baseline file,
+                                jxon_perf_baseline.json by default
+    JXON_PERF_THRESHOLD         maximal ratio of time to the baseline, 1.5
+    JXON_PERF_MEMORY_THRESHOLD  maximal ratio of allocations, 1.2
+    JXON_PERF_UPDATE            1 to replace the baseline with this run
+"""
+
+import array
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+import pytest
+
+import jxon
+
+EXAMPLES_PREFIX = '../examples/'
+
+BASELINE_PATH = os.environ.get('JXON_PERF_BASELINE', 'jxon_perf_baseline.json')
+THRESHOLD = float(os.environ.get('JXON_PERF_THRESHOLD', '1.5'))
+MEMORY_THRESHOLD = float(os.environ.get('JXON_PERF_MEMORY_THRESHOLD', '1.2'))
+UPDATE = os.environ.get('JXON_PERF_UPDATE') == '1'
+
+def read_example(name):
+    """Returns content of the file from examples directory."""
+
+    with open(os.path.join(EXAMPLES_PREFIX, name), 'rb') as f:
+        return f.read()
+
+def movies_workloads():
+    """Encodes and decodes the movies dataset."""
+
+    data = read_example('movies_compressed.jxon')
+    movies = jxon.decode(data)
+    keys = ['id', 'title', 'year', 'director', 'genres']
+    return {
+        'decode_movies': lambda: jxon.decode(data),
+        'encode_movies': lambda: jxon.encode(movies, keys_table=keys),
+    }
+
+def tiny_workloads():
+    """Encodes and decodes many tiny messages one by one."""
+
+    messages = [{'id': i, 'ok': True, 'v': i * 0.5} for i in range(10000)]
+    blobs = [jxon.encode(message) for message in messages]
+    return {
+        'decode_tiny': lambda: [jxon.decode(blob) for blob in blobs],
+        'encode_tiny': lambda: [jxon.encode(message) for message in messages],
+    }
+
+def blob_workloads():
+    """Encodes and decodes big BLOBs."""
+
+    value = [bytes(range(256)) * 16384] * 4 # 4 BLOBs of 4 MB
+    data = jxon.encode(value)
+    return {
+        'decode_blobs': lambda: jxon.decode(data),
+        'encode_blobs': lambda: jxon.encode(value),
+    }
+
+def float_workloads():
+    """Encodes and decodes arrays of floats, element by element and typed."""
+
+    values = [i / 7 for i in range(200000)]
+    typed = array.array('d', values)
+    data = jxon.encode(values)
+    return {
+        'decode_floats': lambda: jxon.decode(data),
+        'encode_floats': lambda: jxon.encode(values),
+        'decode_typed_floats': lambda: jxon.decode(data, typed_arrays='array'),
+        'encode_typed_floats': lambda: jxon.encode(typed),
+    }
+
+WORKLOADS = {}
+for make_workloads in (movies_workloads, tiny_workloads, blob_workloads, float_workloads):
+    WORKLOADS.update(make_workloads())
+
+def measure(workload):
+    """Returns the least time of one run in seconds, peak of memory traced
+       while running and the number of memory blocks kept by the result.
+    """
+
+    number, total = timeit.Timer(workload).autorange()
+    times = timeit.repeat(workload, number=number, repeat=5)
+    seconds = min(*times, total) / number
+
+    tracemalloc.start()
+    blocks = sys.getallocatedblocks()
+    result = workload()
+    blocks = sys.getallocatedblocks() - blocks
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return {'seconds': seconds, 'peak_bytes': peak, 'blocks': blocks}
+
+@pytest.fixture(scope='module')
+def baseline():
+    """Loads the baseline and saves it with measurements of new workloads."""
+
+    try:
+        with open(BASELINE_PATH, encoding='utf-8') as f:
+            values = json.load(f)
+    except FileNotFoundError:
+        values = {}
+    recorded = dict(values)
+    yield values
+    if values != recorded:
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as f:
+            json.dump(values, f, indent=4, sort_keys=True)
+
+@pytest.mark.parametrize('name', sorted(WORKLOADS))
+def test_perf(name, baseline): # pylint: disable=redefined-outer-name
+    """Checks that the workload is not slower and does not allocate more
+       than the baseline allows.
+    """
+
+    result = measure(WORKLOADS[name])
+    expected = baseline.get(name)
+    if expected is None or UPDATE:
+        baseline[name] = result
+        return
+
+    ratio = result['seconds'] / expected['seconds']
+    assert ratio <= THRESHOLD, (
+        f"{name} takes {result['seconds'] * 1e3:.3f} ms, "
+        f"{ratio:.2f}x of {expected['seconds'] * 1e3:.3f} ms in the baseline")
+    for key in ('peak_bytes', 'blocks'):
+        limit = max(expected[key] * MEMORY_THRESHOLD, expected[key] + 1024)
+        assert result[key] <= limit, (
+            f"{name} allocates {result[key]} {key}, {expected[key]} in the baseline")
+
+def test_encode_scaling():
+    """Checks that encoding time grows linearly with size of the value."""
+
+    def encoding_time(count):
+        value = [[i, str(i)] for i in range(count)]
+        return min(timeit.repeat(lambda: jxon.encode(value), number=1, repeat=3))
+
+    # 8 times more elements, quadratic encoder would be 64 times slower
+    assert encoding_time(125_000) / encoding_time(15_625) < 24
@@ -1,9 +1,17 @@
 """Tests for jxon module."""
 
 import math
+import array
+import asyncio
 import base64
+import collections
+import dataclasses
+import fractions
+import io
 import json
+import mmap
 import os
+import struct
 
 import pytest
 
@@ -102,8 +110,47 @@ def test_integers():
     assert is_bijective(min32 - 1,  b'\x8D\xFF\xFF\xFF\x7F\xFF\xFF\xFF\xFF')
     assert is_bijective(max32 + 1,  b'\x8D\x00\x00\x00\x80\x00\x00\x00\x00')
 
-    with pytest.raises(NotImplementedError):
-        jxon.encode(max64 + 1)
+    assert is_bijective(max64 + 1,  b'\x8E\x00\x00\x00\x00\x00\x00\x00\x80'
+                                    b'\x01\x00\x00\x00\x00\x00\x00\x00')
+    assert is_bijective(min64 - 1,  b'\x8E\xFF\xFF\xFF\xFF\xFF\xFF\xFF\xFF'
+                                    b'\xFE\xFF\xFF\xFF\xFF\xFF\xFF\x7F')
+
+
+def test_bigints():
+    """Checks BigInt in integers, sizes and big floats."""
+
+    for i in (2**125, 2**126, -2**126, -2**126 - 1, 2**504, -2**504, 2**1000 - 1,
+              10**10000, -10**10000):
+        assert jxon.decode(jxon.encode(i)) == i
+        assert jxon.decode(jxon.encode([i, 1])) == [i, 1]
+    assert jxon.decode(b'\x8E\x05\x00\x00\x00\x00\x00\x00\x00') == 5
+    assert jxon.decode(b'\xAE\x02\x00\x00\x00\x00\x00\x00\x00ab\x00') == 'ab'
+    check_invalid_jxon(b'\x8E\x05\x00\x00\x00\x00\x00\x00\x80')
+    check_invalid_jxon(b'\x8E\x05\x00\x00')
+
+    half = fractions.Fraction(1, 2)
+    assert jxon.decode(b'\xF9\x01\x00\x00\x00\x00\x00\x00\x00'
+                       b'\xFF\xFF\xFF\xFF\xFF\xFF\xFF\x7F') == half
+    for value in (fractions.Fraction(1, 2**2000), fractions.Fraction(3**500, 2**10),
+                  fractions.Fraction(-3**500), fractions.Fraction(2**3000)):
+        blob = jxon.encode(value)
+        assert blob[0] == 0xF9
+        assert jxon.decode(blob) == value
+        assert jxon.decode(jxon.encode({'a': value, 'b': 1}), fields=['b']) == {'b': 1}
+    with pytest.raises(ValueError):
+        jxon.encode(fractions.Fraction(1, 3))
+
+    # exponents are limited, 2**31 would take hundreds of megabytes
+    assert jxon.decode(jxon.encode(fractions.Fraction(2**(2**20)))) == 2**(2**20)
+    with pytest.raises(ValueError):
+        jxon.encode(fractions.Fraction(1, 2**(2**20 + 1)))
+    for exponent in (2**31, -2**31):
+        huge = b'\xF9\x01' + bytes(7) + struct.pack('<Q', exponent & (2**63 - 1))
+        check_invalid_jxon(huge)
+        with pytest.raises(ValueError):
+            jxon.Parser().feed(huge)
+        with pytest.raises(ValueError):
+            jxon.load(io.BytesIO(huge))
 
 def test_floats():
     """Test integer values.
@@ -114,6 +161,40 @@ def test_floats():
 
     assert is_bijective(1.0, b'\xF7\x00\x00\x80\x3F')
     assert is_bijective(0.5, b'\xF7\x00\x00\x00\x3F')
+    assert is_bijective(2.0**-149, b'\xF7\x01\x00\x00\x00') # denormalized
+    assert is_bijective(-2.0**-1074, b'\xF8\x01\x00\x00\x00\x00\x00\x00\x80')
+    assert is_bijective(0.1, b'\xF8\x9A\x99\x99\x99\x99\x99\xB9\x3F')
+    assert is_bijective(1e300, b'\xF8' + struct.pack('<d', 1e300))
+    assert is_bijective(math.inf, b'\xF7\x00\x00\x80\x7F')
+    for value in (3.4028234663852886e38, 2.0**-126, 2.0**-127, 16777216.0,
+                  16777217.0, 1 / 3, 1e-40, 1e-310):
+        assert jxon.encode(value) == jxon.encode(fractions.Fraction(value))
+        assert jxon.decode(jxon.encode(value)) == value
+
+def test_float_mode():
+    """Checks encoding floats with fixed sizes."""
+
+    values = [0.0, 0.5, 0.1, -1e300, math.inf]
+    blob = jxon.encode(values, float_mode='f64')
+    assert blob == b'\xF4' + b''.join(b'\xF8' + struct.pack('<d', value)
+                                    for value in values) + b'\xF5'
+    assert jxon.decode(blob) == values
+    blob = jxon.encode(values, float_mode='f32_lossy')
+    assert len(blob) == 2 + 5 * len(values)
+    assert jxon.decode(blob) == [0.0, 0.5, 0.10000000149011612, -math.inf, math.inf]
+    assert jxon.decode(blob, typed_arrays='array').typecode == 'f'
+    assert jxon.encode(values, float_mode='shortest') == jxon.encode(values)
+    with pytest.raises(ValueError):
+        jxon.encode(values, float_mode='f16')
+
+    class Float(float):
+        """Subclass of float."""
+
+    stream = io.BytesIO()
+    jxon.dump({'x': Float(0.5)}, stream, float_mode='f64')
+    encoder = jxon.Encoder(float_mode='f64')
+    assert stream.getvalue() == encoder.encode({'x': 0.5}) == \
+        jxon.encode({'x': 0.5}, float_mode='f64')
 
 def check_invalid_jxon(invalid_JXON):
     """Checks that decoder raises ValueError for the specified invalid_JXON"""
@@ -145,3 +226,679 @@ def test_examples():
                 expected = f.read()
 
             assert are_deeply_equal(original, jxon.decode(expected))
+
+def test_decode_buffers():
+    """Checks that decoder accepts any buffer and detects truncated input."""
+
+    with open(os.path.join(EXAMPLES_PREFIX, 'movies_compressed.jxon'), 'rb') as f:
+        data = f.read()
+    expected = jxon.decode(data)
+    assert jxon.decode(bytearray(data)) == expected
+    assert jxon.decode(memoryview(data)) == expected
+    assert jxon.decode(memoryview(b'\x00' + data)[1:]) == expected
+
+    check_invalid_jxon(data[:-1])
+    check_invalid_jxon(b'\xA5abc')
+    check_invalid_jxon(b'\xF4\x81')
+    check_invalid_jxon(b'\xF4\xF5\xF5'[2:])
+
+def test_table_puts():
+    """Checks that table puts are allowed before keys and values."""
+
+    assert jxon.decode(b'\xF3\xB1k\x00\x05\x05\x81\xF5') == {'k': 1}
+    assert jxon.decode(b'\xF3\xA1k\x00\xB1v\x00\x05\x81\x05\x82\xF5') == {'k': 1, 'v': 2}
+    check_invalid_jxon(b'\xB1k\x00\x80\xF0')
+
+def test_dump_load():
+    """Checks that dump() and load() work with file objects in chunks."""
+
+    class Writer: # pylint: disable=too-few-public-methods # file-like stub
+        """Collects chunks written to it."""
+
+        def __init__(self):
+            self.chunks = []
+
+        def write(self, chunk):
+            """Remembers the chunk."""
+            self.chunks.append(bytes(chunk))
+
+    value = [{'id': i, 'name': str(i) * 10} for i in range(20000)]
+    writer = Writer()
+    jxon.dump(value, writer, keys_table=['id', 'name'])
+    assert len(writer.chunks) > 1
+    assert max(len(chunk) for chunk in writer.chunks) < 65536 + 1024
+    data = b''.join(writer.chunks)
+    assert data == jxon.encode(value, keys_table=['id', 'name'])
+
+    assert jxon.load(io.BytesIO(data)) == value
+    assert jxon.load(io.BytesIO(b'{"a": [1, 2]}')) == {'a': [1, 2]}
+
+    # table puts inside a value larger than the read buffer
+    data = (b'\xB1a\x00\x00\xF4\xF3\x00\x80\xF5\xB1b\x00\x00\xF3\x00\x81\xF5'
+            + jxon.encode('x' * 100000) + b'\xF5')
+    assert jxon.load(io.BytesIO(data)) == [{'a': 0}, {'b': 1}, 'x' * 100000]
+    with pytest.raises(ValueError):
+        jxon.load(io.BytesIO(data[:-1]))
+    with pytest.raises(ValueError):
+        jxon.load(io.BytesIO(b'\xF4\x81\x82\xF5\xF5'[3:]), allow_JSON=False)
+
+def test_parser():
+    """Checks that Parser returns values as soon as they are complete."""
+
+    with open(os.path.join(EXAMPLES_PREFIX, 'movies_compressed.jxon'), 'rb') as f:
+        movies = f.read()
+    expected = jxon.decode(movies)
+    for size in (1, 2, 3, 7, 1000, 100000):
+        parser = jxon.Parser()
+        values = []
+        for i in range(0, len(movies), size):
+            values += parser.feed(movies[i:i + size])
+        parser.close()
+        assert values == [expected]
+
+    parser = jxon.Parser()
+    assert not parser.feed(b'\xF4\x81')
+    assert parser.feed(b'\xF5\xA5hel') == [[1]]
+    assert parser.feed(b'lo\x00\xB1k\x00') == ['hello']
+    assert parser.feed(b'\x07\xF3\x07\xF0\xF5\x82') == [{'k': None}, 2]
+    assert not parser.feed(b'\xF3\x07')
+    with pytest.raises(ValueError):
+        parser.close()
+    with pytest.raises(ValueError):
+        parser.feed(b'\xF5')
+
+    # the slot is redefined inside an array that does not fit the input
+    data = b'\xB1a\x00\x00\xF4\xF3\x00\x81\xF5\xB1b\x00\x00\xF3\x00\x82\xF5\xF5'
+    parser = jxon.Parser()
+    assert not parser.feed(data[:-1])
+    assert parser.feed(data[-1:]) == [[{'a': 1}, {'b': 2}]]
+    assert jxon.decode(data) == [{'a': 1}, {'b': 2}]
+
+def test_iterparse():
+    """Checks events of iterparse() for buffers and files."""
+
+    data = b'\xB1k\x00\x05\xF3\x05\xF4\x81\xA2hi\x00\xF5\xA1x\x00\xF0\xF5\x82'
+    assert list(jxon.iterparse(data)) == [
+        ('table_put', (5, 'k'), 0),
+        ('start_object', None, 4),
+        ('key', 'k', 5),
+        ('start_array', None, 6),
+        ('scalar', 1, 7),
+        ('scalar', 'hi', 8),
+        ('end', None, 12),
+        ('key', 'x', 13),
+        ('scalar', None, 16),
+        ('end', None, 17),
+        ('scalar', 2, 18),
+    ]
+
+    with open(os.path.join(EXAMPLES_PREFIX, 'movies_compressed.jxon'), 'rb') as f:
+        movies = f.read()
+    events = list(jxon.iterparse(movies))
+    assert events == list(jxon.iterparse(io.BytesIO(movies)))
+    years = [event[1] for previous, event in zip(events, events[1:])
+             if previous[:2] == ('key', 'year')]
+    assert years == [movie['year'] for movie in jxon.decode(movies)['movies']]
+
+    with pytest.raises(ValueError):
+        list(jxon.iterparse(movies[:-1]))
+    with pytest.raises(ValueError):
+        jxon.build_index(b'\xF4\x9F' + bytes(15) + b'\xF5')
+
+def test_iterparse_json(monkeypatch, tmp_path):
+    """Checks that JSON is transcoded to JXON and back by events."""
+
+    data = b' {"k": [1, "h\\u0069"], "x" :null}\n2.5'
+    assert list(jxon.iterparse_json(data)) == [
+        ('start_object', None, 1),
+        ('key', 'k', 2),
+        ('start_array', None, 7),
+        ('scalar', 1, 8),
+        ('scalar', 'hi', 11),
+        ('end', None, 20),
+        ('key', 'x', 23),
+        ('scalar', None, 28),
+        ('end', None, 32),
+        ('scalar', 2.5, 34),
+    ]
+    for invalid in (b'[1,]', b'{"a" 1}', b'{"a":1,}', b'{1:2}', b'[1 2]', b'[1 {}]', b'01', b'"a',
+                    b'[1,'):
+        with pytest.raises(ValueError):
+            list(jxon.iterparse_json(invalid))
+
+    with open(os.path.join(EXAMPLES_PREFIX, 'movies.json'), 'rb') as f:
+        movies = f.read()
+    expected = json.loads(movies)
+    events = list(jxon.iterparse_json(movies))
+    monkeypatch.setattr('jxon._streams._READ_SIZE', 7) # tokens span chunks
+    assert list(jxon.iterparse_json(io.BytesIO(movies))) == events
+
+    stream = io.BytesIO()
+    jxon.dump_events(events, stream)
+    assert stream.getvalue() == jxon.encode(expected)
+    stream = io.BytesIO()
+    counts = collections.Counter(value for event, value, _ in events if event == 'key')
+    jxon.dump_events(jxon.iterparse(jxon.encode(expected)), stream, key_counts=counts)
+    assert stream.getvalue() == jxon.encode(expected, auto_keys=True)
+
+    # every value of a stream gets the table puts
+    records = [{'name': f'n{i}', 'value': [i] * 10} for i in range(50)]
+    lines = b'\n'.join(json.dumps(record).encode() for record in records)
+    stream = io.BytesIO()
+    jxon.dump_events(jxon.iterparse_json(lines), stream, keys_table=['name', 'value'])
+    assert stream.getvalue() == b''.join(jxon.encode(record, keys_table=['name', 'value'])
+                                         for record in records)
+    path = tmp_path / 'records.jxon'
+    with open(path, 'wb') as f:
+        jxon.dump_events(jxon.iterparse_json(lines), f, key_counts={'name': 9, 'value': 9})
+    assert list(jxon.iter_file(path)) == records
+    assert path.read_bytes().count(b'\xB4name') == len(records)
+
+def test_decode_lazy():
+    """Checks that lazy views give the same values as decode()."""
+
+    for name in ('movies.jxon', 'movies_compressed.jxon'):
+        with open(os.path.join(EXAMPLES_PREFIX, name), 'rb') as f:
+            data = f.read()
+        expected = jxon.decode(data)
+        movies = jxon.decode_lazy(data)['movies']
+        assert movies[500]['year'] == expected['movies'][500]['year']
+        assert movies[-1] == expected['movies'][-1]
+        assert movies[10:20] == expected['movies'][10:20]
+        assert len(movies) == len(expected['movies'])
+        assert jxon.decode_lazy(data) == expected
+        with pytest.raises(IndexError):
+            _ = movies[len(movies)]
+
+    # the table is changed in the middle of the document
+    lazy = jxon.decode_lazy(b'\xB1k\x00\x05\xF3\x05\xF4\x81\xB1j\x00\x05'
+                            b'\xF3\x05\x82\xF5\xF5\x05\x83\xF5')
+    assert lazy['j'] == 3
+    assert lazy['k'][1] == {'j': 2}
+    assert 'x' not in lazy
+    assert jxon.decode_lazy(b'\x81') == 1
+
+    with pytest.raises(ValueError):
+        list(jxon.decode_lazy(b'\xF4\x81\xA5ab'))
+
+def test_index():
+    """Checks that Index finds values and survives dumping and loading."""
+
+    with open(os.path.join(EXAMPLES_PREFIX, 'movies_compressed.jxon'), 'rb') as f:
+        data = f.read()
+    expected = jxon.decode(data)
+    index = jxon.build_index(io.BytesIO(data))
+    assert index.decode(data) == expected
+    assert index.decode(data, ['movies', 999]) == expected['movies'][999]
+
+    stream = io.BytesIO()
+    index.dump(stream)
+    stream.seek(0)
+    loaded = jxon.Index.load(stream)
+    assert loaded.containers == index.containers
+    assert loaded.decode(data, ['movies', 500, 'title']) == expected['movies'][500]['title']
+    with pytest.raises(KeyError):
+        loaded.find(['movies', 500, 'rating'])
+    with pytest.raises(TypeError):
+        loaded.find(['movies', 500, 'year', 0])
+
+    # the table is changed in the middle of the document
+    data = b'\xB1k\x00\x05\xF3\x05\xF4\x81\xB1j\x00\x05\xF3\x05\x82\xF5\xF5\x05\x83\xF5'
+    index = jxon.build_index(data)
+    assert index.roots == [4]
+    assert index.containers[4] == (20, {'k': 6, 'j': 18})
+    assert index.decode(data, ['k', 1]) == {'j': 2}
+    assert index.decode(data, ['j']) == 3
+
+def test_decode_fields():
+    """Checks that decode() with fields returns only the selected paths."""
+
+    for name in ('movies.jxon', 'movies_compressed.jxon', 'movies.json'):
+        with open(os.path.join(EXAMPLES_PREFIX, name), 'rb') as f:
+            data = f.read()
+        movies = jxon.decode(data)['movies']
+        assert jxon.decode(data, fields=['movies', '*', 'year']) == {
+            'movies': [{'year': movie['year']} for movie in movies]}
+        assert jxon.decode(data, fields=[['movies', 3],
+                                         ['movies', '*', 'genres', 0],
+                                         ['movies', '*', 'year']]) == {
+            'movies': [movie if i == 3 else {'year': movie['year'],
+                                             'genres': movie['genres'][:1]}
+                       for i, movie in enumerate(movies)]}
+
+    assert jxon.decode(b'\x81', fields=['a']) == 1
+    assert jxon.decode(b'\xB1k\x00\x05\xF3\x05\x81\xA1j\x00\x82\xF5',
+                       fields=['k']) == {'k': 1}
+    assert jxon.decode(b'\xF3\xA1a\x00\xF3\xA1b\x00\x81\xF5\xF5',
+                       fields=['a', 'b', 'c']) == {'a': {}}
+    check_invalid_jxon(b'\xF3\xA1a\x00\x81\xA1b\x00\xA5ab')
+
+
+def test_auto_keys():
+    """Checks that encode() with auto_keys chooses and updates the table."""
+
+    with open(os.path.join(EXAMPLES_PREFIX, 'movies.json'), 'rb') as f:
+        movies = jxon.decode(f.read())
+    with open(os.path.join(EXAMPLES_PREFIX, 'movies_compressed.jxon'), 'rb') as f:
+        compressed = f.read()
+    blob = jxon.encode(movies, auto_keys=True)
+    assert jxon.decode(blob) == movies
+    assert len(blob) == len(compressed)
+
+    # 400 distinct keys do not fit the table, each section reuses its own
+    value = {'sections': [[{f's{s}_key{k}': k for k in range(40)}] * 20
+                          for s in range(10)]}
+    blob = jxon.encode(value, auto_keys=True)
+    assert jxon.decode(blob) == value
+    assert len(blob) * 2 < len(jxon.encode(value))
+    f = io.BytesIO()
+    jxon.dump(value, f, auto_keys=True)
+    assert f.getvalue() == blob
+
+    assert jxon.encode({'a': 1}, auto_keys=True) == jxon.encode({'a': 1})
+    with pytest.raises(ValueError):
+        jxon.encode({'a': 1}, keys_table=['a'], auto_keys=True)
+
+
+def test_session():
+    """Checks that Session keeps the keys table across messages."""
+
+    sender = jxon.Session()
+    receiver = jxon.Session()
+    messages = [{'method': 'get', 'id': i, 'params': {'id': i}} for i in range(3)]
+    blobs = [sender.encode(message) for message in messages]
+    assert len(blobs[1]) < len(jxon.encode(messages[1])) // 2
+    assert len(blobs[1]) == len(blobs[2])
+    assert [receiver.decode(blob) for blob in blobs] == messages
+
+    # a failed message does not leave its keys in the table
+    with pytest.raises(TypeError):
+        sender.encode({'new': 1, 'bad': object()})
+    assert receiver.decode(sender.encode({'new': 1})) == {'new': 1}
+
+    sender = jxon.Session(keys_table=['method'])
+    receiver = jxon.Session(keys_table=['method'])
+    blob = sender.encode({'method': 'get'})
+    assert blob == b'\xF3\x00\xA3get\x00\xF5'
+    assert receiver.decode(blob) == {'method': 'get'}
+    keys = {f'key{i}': i for i in range(200)}
+    assert receiver.decode(sender.encode(keys)) == keys
+    assert receiver.decode(sender.encode(keys)) == keys
+
+
+def test_record_stream(tmp_path):
+    """Checks reading files of records written one after another."""
+
+    records = [{'id': i, 'name': f'record {i}', 'tags': ['a'] * (i % 3)}
+               for i in range(1000)]
+    path = tmp_path / 'records.jxon'
+    offsets = []
+    with open(path, 'wb') as f:
+        for record in records:
+            offsets.append(f.tell())
+            jxon.dump(record, f, auto_keys=True)
+    assert list(jxon.iter_file(path)) == records
+    assert jxon.decode_file_parallel(path, workers=2) == records
+    assert jxon.decode_file_parallel(path, workers=1) == records
+    assert jxon.decode_file_parallel(path, workers=3, offsets=offsets) == records
+    assert jxon.decode_file_parallel(path, workers=3, offsets=offsets[::100]) == records
+
+    # records share the keys table like values fed to Parser
+    shared = tmp_path / 'shared.jxon'
+    puts = b'\xB2id\x00\x00\xB4name\x00\x01\xB4tags\x00\x02'
+    data = puts + b''.join(jxon.encode(record, keys_table=['id', 'name', 'tags'])[len(puts):]
+                           for record in records)
+    shared.write_bytes(data)
+    parser = jxon.Parser()
+    assert parser.feed(data) == records
+    assert list(jxon.iter_file(shared)) == records
+    assert jxon.decode_file_parallel(shared, workers=2) == records
+
+    empty = tmp_path / 'empty.jxon'
+    empty.write_bytes(b'')
+    assert not list(jxon.iter_file(empty))
+    assert jxon.decode_file_parallel(empty) == []
+
+    truncated = tmp_path / 'truncated.jxon'
+    truncated.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(ValueError):
+        list(jxon.iter_file(truncated))
+    with pytest.raises(ValueError):
+        jxon.decode_file_parallel(truncated, workers=2)
+
+
+def test_typed_arrays():
+    """Checks encoding of array.array and decoding of typed arrays."""
+
+    for typecode in 'bhilqBHIf':
+        values = array.array(typecode, [0, 1, 2, 100])
+        blob = jxon.encode({'values': values})
+        assert jxon.decode(blob) == {'values': values.tolist()}
+        decoded = jxon.decode(blob, typed_arrays='array')['values']
+        assert isinstance(decoded, array.array)
+        assert decoded.tolist() == values.tolist()
+    values = array.array('d', [0.5 * i for i in range(10000)])
+    assert jxon.encode(values)[:10] == b'\xF4\xF8' + bytes(8)
+    assert jxon.decode(memoryview(jxon.encode(values)), typed_arrays='array') == values
+    assert jxon.decode(jxon.encode(array.array('Q', [1, 2]))) == [1, 2]
+
+    # arrays of values of different types or sizes are decoded as lists
+    assert jxon.decode(b'\xF4\xF5', typed_arrays='array') == []
+    assert jxon.decode(b'\xF4\x8A\x01\x8A\x02\xF5', typed_arrays='array') == \
+        array.array('b', [1, 2])
+    assert jxon.decode(b'\xF4\x8A\x01\x8B\x02\x00\xF5', typed_arrays='array') == [1, 2]
+    assert jxon.decode(b'\xF4\x8A\x01\x81\xF5', typed_arrays='array') == [1, 1]
+    check_invalid_jxon(b'\xF4\x8A\x01\x8A')
+    with pytest.raises(ValueError):
+        jxon.decode(b'\xF4\x8A\x01\x8A\x02\xF5', typed_arrays='list')
+
+
+def test_numpy_arrays():
+    """Checks encoding and decoding of numpy arrays."""
+
+    numpy = pytest.importorskip('numpy')
+    for dtype in ('i1', 'i2', '>i4', 'i8', 'u1', 'u2', 'u4', 'f4', '>f8'):
+        values = numpy.arange(100, dtype=dtype)
+        blob = jxon.encode(values)
+        assert jxon.decode(blob) == values.tolist()
+        decoded = jxon.decode(blob, typed_arrays='numpy')
+        assert isinstance(decoded, numpy.ndarray)
+        assert decoded.tolist() == values.tolist()
+    matrix = numpy.arange(6, dtype='f8').reshape(2, 3)
+    assert jxon.decode(jxon.encode(matrix)) == matrix.tolist()
+    assert jxon.encode(numpy.int64(5)) == b'\x85'
+    assert isinstance(jxon.decode(jxon.encode(numpy.int64(5))), int)
+    assert jxon.decode(jxon.encode(numpy.uint64(2**64 - 1))) == 2**64 - 1
+    assert jxon.decode(jxon.encode(numpy.int64(2**60 + 1))) == 2**60 + 1
+
+
+def test_decode_columns():
+    """Checks that decode_columns() transposes arrays of objects."""
+
+    for name in ('movies.jxon', 'movies_compressed.jxon'):
+        with open(os.path.join(EXAMPLES_PREFIX, name), 'rb') as f:
+            data = f.read()
+        movies = jxon.decode(data)['movies']
+        columns = jxon.decode_columns(data, path='movies')
+        assert columns == {key: [movie[key] for movie in movies]
+                           for key in movies[0]}
+        columns = jxon.decode_columns(data, 'movies', typed_arrays='array')
+        assert columns['year'] == array.array('q', [movie['year'] for movie in movies])
+
+    records = [{'a': 1, 'b': 'x'}, {'b': 'y', 'c': 2.5}, {'a': 4}]
+    assert jxon.decode_columns(jxon.encode({'r': [records]}), ['r', 0]) == {
+        'a': [1, None, 4], 'b': ['x', 'y', None], 'c': [None, 2.5, None]}
+    assert jxon.decode_columns(b'\xF4\xF3\xA1a\x00\x83\xA1a\x00\x84\xF5\xF5') == {
+        'a': [4]}
+    assert jxon.decode_columns(jxon.encode([]), typed_arrays='array') == {}
+    mixed = jxon.encode([{'a': 0.5}, {'a': 2**53}])
+    assert jxon.decode_columns(mixed, typed_arrays='array') == {'a': array.array('d', [0.5, 2**53])}
+    mixed = jxon.encode([{'a': 0.5}, {'a': 2**53 + 1}])
+    assert jxon.decode_columns(mixed, typed_arrays='array') == {'a': [0.5, 2**53 + 1]}
+    with pytest.raises(KeyError):
+        jxon.decode_columns(jxon.encode({'r': []}), 'x')
+    with pytest.raises(ValueError):
+        jxon.decode_columns(jxon.encode([1]))
+    with pytest.raises(ValueError):
+        jxon.decode_columns(b'\xF4\xF3\xA1a\x00\x81')
+
+
+def test_encode_columns():
+    """Checks storing arrays of objects by columns."""
+
+    with open(os.path.join(EXAMPLES_PREFIX, 'movies.json'), 'rb') as f:
+        document = jxon.decode(f.read())
+    movies = document['movies']
+    with open(os.path.join(EXAMPLES_PREFIX, 'movies_compressed.jxon'), 'rb') as f:
+        compressed = f.read()
+    blob = jxon.encode(document, columns=True, auto_keys=True)
+    assert len(blob) < len(compressed)
+    assert jxon.decode(blob, columns=True) == document
+    assert list(jxon.decode(blob)['movies']) == ['@columns']
+    columns = jxon.decode_columns(blob, 'movies', typed_arrays='array')
+    assert columns['year'] == array.array('h', [movie['year'] for movie in movies])
+    assert columns['title'] == [movie['title'] for movie in movies]
+
+    value = [[{'a': 1, 'b': True}, {'b': False, 'a': -200}], [{'a': 1}, {'b': 2}], [{}]]
+    blob = jxon.encode(value, columns=True)
+    assert blob.startswith(b'\xF4\xF3\xA8@columns\x00\xF3\xA1a\x00\xF4\x8B\x01\x00\x8B\x38\xFF\xF5')
+    assert jxon.decode(blob, columns=True) == value
+    f = io.BytesIO()
+    jxon.dump(value, f, columns=True)
+    assert f.getvalue() == blob
+    with pytest.raises(ValueError):
+        jxon.decode(jxon.encode({'@columns': {'a': [1], 'b': []}}), columns=True)
+
+    # objects without keys are not stored by columns, there are no columns
+    # keeping their number
+    value = [{}, {}, [{}] * 3]
+    assert jxon.decode(jxon.encode(value, columns=True), columns=True) == value
+    # objects looking like stored by columns are rejected
+    for value in ({'@columns': {'a': [1, 2]}}, [collections.OrderedDict({'@columns': {}})]):
+        with pytest.raises(ValueError):
+            jxon.encode(value, columns=True)
+    value = [{'@columns': 1}, {'@columns': {'a': [1]}}]
+    assert jxon.decode(jxon.encode(value, columns=True), columns=True) == value
+
+
+@dataclasses.dataclass
+class Movie:
+    """Dataclass for test_encoder."""
+
+    title: str
+    year: int
+    genres: list
+
+
+class Point: # pylint: disable=too-few-public-methods # test fixture
+    """Class with __slots__ for test_encoder."""
+
+    __slots__ = ('x', 'y')
+
+    def __init__(self, x, y=None):
+        self.x = x
+        if y is not None:
+            self.y = y
+
+
+def test_encoder():
+    """Checks that Encoder encodes dataclasses and classes with __slots__."""
+
+    encoder = jxon.Encoder(keys_table=['title'])
+    movie = Movie('Heat', 1995, ['crime'])
+    blob = encoder.encode({'movies': [movie, movie]})
+    assert blob == jxon.encode({'movies': [dataclasses.asdict(movie)] * 2},
+                               keys_table=['title'])
+    assert encoder.encode(movie) == blob[:8] + b'\xF3\x00\xA4Heat\x00' \
+        b'\xA4year\x00\x8B\xCB\x07\xA6genres\x00\xF4\xA5crime\x00\xF5\xF5'
+    assert jxon.decode(encoder.encode([Point(1, 2), Point(3)])) == [
+        {'x': 1, 'y': 2}, {'x': 3}]
+    f = io.BytesIO()
+    encoder.dump(movie, f)
+    assert f.getvalue() == encoder.encode(movie)
+
+    with pytest.raises(TypeError):
+        jxon.encode(movie)
+    with pytest.raises(TypeError):
+        encoder.encode(object())
+    with pytest.raises(TypeError):
+        encoder.encode(Exception())
+
+
+def test_object_factory():
+    """Checks decoding objects with object_factory."""
+
+    with open(os.path.join(EXAMPLES_PREFIX, 'movies_compressed.jxon'), 'rb') as f:
+        data = f.read()
+    movies = jxon.decode(data)['movies']
+    records = jxon.decode(data, object_factory='namedtuple').movies
+    assert [record._asdict() for record in records] == movies
+    assert type(records[0]) is type(records[1])
+    records = jxon.decode(data, object_factory='slots').movies
+    assert isinstance(records[0], jxon.Record)
+    assert not hasattr(records[0], '__dict__')
+    assert [record._asdict() for record in records] == movies
+    assert records[0] == jxon.decode(data, object_factory='slots').movies[0]
+    assert jxon.decode(data, object_factory='tuple')[0][0] == tuple(movies[0].values())
+
+    blob = jxon.encode([{'a': 1, 'b': {'c': 2}}, {'not valid': 1}, {'_a': 2}])
+    assert jxon.decode(blob, object_factory='namedtuple') == [(1, (2,)), {'not valid': 1},
+                                                              {'_a': 2}]
+    shapes = []
+    assert jxon.decode(blob, object_factory=shapes.append) == \
+        jxon.decode(blob)
+    assert shapes == [('c',), ('a', 'b'), ('not valid',), ('_a',)]
+
+    @dataclasses.dataclass
+    class Sized: # pylint: disable=too-few-public-methods # unhashable callable
+        """Counts keys of objects."""
+
+        size: int = 0
+
+        def __call__(self, keys):
+            self.size += len(keys)
+
+    sized = Sized()
+    assert jxon.decode(blob, object_factory=sized) == jxon.decode(blob)
+    assert sized.size == 5
+    assert jxon.decode(b'\xF3\xA1a\x00\x81\xA1a\x00\x82\xF5', object_factory='slots') == \
+        {'a': 2}
+    with pytest.raises(ValueError):
+        jxon.decode(blob, object_factory='dict')
+
+
+def test_string_cache(tmp_path):
+    """Checks interning of keys and StringCache."""
+
+    with open(os.path.join(EXAMPLES_PREFIX, 'movies.jxon'), 'rb') as f:
+        data = f.read()
+    movies = jxon.decode(data)['movies']
+    assert all(next(iter(movie)) is next(iter(movies[0])) for movie in movies)
+
+    cache = jxon.StringCache(maxsize=100)
+    for buffer in (data, bytearray(data), memoryview(data)):
+        cached = jxon.decode(buffer, string_cache=cache)['movies']
+        assert cached == movies
+        comedies = [genre for movie in cached for genre in movie['genres']
+                    if genre == 'comedy']
+        assert all(genre is comedies[0] for genre in comedies)
+    assert cache.hits > cache.misses > 0
+    cache.clear()
+    assert cache.hits == cache.misses == 0
+
+    # the cache does not keep the buffer
+    path = tmp_path / 'movies.jxon'
+    path.write_bytes(data)
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    assert jxon.decode(mapped, string_cache=cache)['movies'] == movies
+    assert jxon.decode(memoryview(mapped), string_cache=cache)['movies'] == movies
+    mapped.close()
+    assert cache.hits > cache.misses > 0
+
+    # long strings are decoded without the cache
+    cache = jxon.StringCache(max_length=8)
+    decoded = jxon.decode(jxon.encode(['12345678', '123456789'] * 2), string_cache=cache)
+    assert decoded == ['12345678', '123456789'] * 2
+    assert decoded[0] is decoded[2] and decoded[1] is not decoded[3]
+    assert (cache.hits, cache.misses) == (1, 1)
+    check_invalid_jxon(b'\xA2\xFF\xFF\x00')
+    with pytest.raises(ValueError):
+        jxon.decode(b'\xA2\xFF\xFF\x00', string_cache=cache)
+
+
+def test_decoder():
+    """Checks that Decoder and Encoder are reusable between calls."""
+
+    decoder = jxon.Decoder(object_factory='namedtuple', typed_arrays='array')
+    encoder = jxon.Encoder(keys_table=['id', 'values'])
+    messages = [{'id': i, 'values': array.array('d', [i])} for i in range(3)]
+    decoded = [decoder.decode(encoder.encode(message)) for message in messages]
+    assert [record._asdict() for record in decoded] == messages
+    assert type(decoded[0]) is type(decoded[2])
+    assert jxon.Decoder(fields=['id']).decode(b'{"id": 1, "x": 2}') == {'id': 1}
+    with pytest.raises(ValueError):
+        jxon.Decoder(allow_JSON=False).decode(b'{}')
+
+    class Text(str):
+        """Subclass of str."""
+
+    assert encoder.encode([Text('a'), True, None, 1.5, b'']) == \
+        jxon.encode(['a', True, None, 1.5, b''], keys_table=['id', 'values'])
+
+def test_stats():
+    """Checks counters of decoded and encoded values by heads."""
+
+    with open(os.path.join(EXAMPLES_PREFIX, 'movies_compressed.jxon'), 'rb') as f:
+        movies = f.read()
+    stats = jxon.Stats()
+    value = jxon.decode(movies, stats=stats)
+    assert value == jxon.decode(movies)
+    assert sum(stats.bytes.values()) == len(movies)
+    assert stats.counts['0xB?'] == 5
+    assert stats.counts['F3'] == stats.counts['F4'] == 1001
+    assert stats.counts['0xA?'] == 4000
+    assert (stats.table_keys, stats.string_keys) == (5000, 1) # "movies" is not in the table
+    assert stats.max_depth == 4
+    assert 'F3' in stats.report()
+
+    stats.clear()
+    stream = io.BytesIO()
+    jxon.dump(value, stream, keys_table=['id', 'title', 'year', 'director', 'genres'],
+              stats=stats)
+    assert stream.getvalue() == movies
+    assert sum(stats.bytes.values()) == len(movies)
+    assert stats.table_hit_rate == 5000 / 5001
+
+    stats.clear()
+    decoder = jxon.Decoder(stats=stats)
+    for data in (b'\xF4\xF3\xA1a\x00\xF8' + bytes(8) + b'\xF5\xF5', b'\xF6'):
+        decoder.decode(data)
+    assert dict(stats.counts) == {'F3': 1, 'F4': 1, 'F6': 1, 'F8': 1}
+    assert stats.bytes['F3'] == 5 and stats.bytes['F8'] == 9
+    assert stats.table_hit_rate == 0.0
+
+def test_async_streams():
+    """Checks reading values from asyncio.StreamReader and writing them."""
+
+    class Writer:
+        """Collects written data like asyncio.StreamWriter."""
+
+        def __init__(self):
+            self.data = bytearray()
+            self.drains = 0
+
+        def write(self, data):
+            """Appends data."""
+            self.data += data
+
+        async def drain(self):
+            """Counts waits for the buffer to drain."""
+            self.drains += 1
+
+    values = [{'id': i, 'name': 'x' * i} for i in range(100)] + [list(range(10000)), 'end']
+
+    async def transfer(executor_threshold):
+        writer = Writer()
+        for value in values:
+            await jxon.awrite(writer, value, keys_table=['id'],
+                              executor_threshold=executor_threshold)
+        assert writer.drains == len(values)
+        reader = asyncio.StreamReader()
+        for i in range(0, len(writer.data), 1000):
+            reader.feed_data(bytes(writer.data[i:i + 1000]))
+        reader.feed_eof()
+        return [value async for value in jxon.aiter_values(
+            reader, executor_threshold=executor_threshold)]
+
+    assert asyncio.run(transfer(1024 * 1024)) == values
+    assert asyncio.run(transfer(100)) == values
+
+    async def truncated():
+        reader = asyncio.StreamReader()
+        reader.feed_data(jxon.encode(values)[:-1])
+        reader.feed_eof()
+        return [value async for value in jxon.aiter_values(reader)]
+
+    with pytest.raises(ValueError):
+        asyncio.run(truncated())